@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SoftDesk.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up. Event streams are served outside of Django's handler (see api/sse.py):
+from api.sse import EventStreamApplication  # noqa: E402
+
+application = EventStreamApplication(django_application)
@@ -50,8 +50,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Optional: Server-Timing headers and timing logs of a sample of requests.
+    'api.middleware.request_timing_middleware',
 ]
 
+# Fraction of requests timed by api.middleware.request_timing_middleware, between 0 and 1.
+REQUEST_TIMING_SAMPLE_RATE = 0.01
+
 ROOT_URLCONF = 'SoftDesk.urls'
 
 TEMPLATES = [
@@ -80,9 +85,50 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Aliases of DATABASES which are read replicas of 'default', used for list and retrieve actions and permission checks
+# (see api/database.py). To try it locally, add a 'replica' entry to DATABASES naming a copy of db.sqlite3,
+# and set DATABASE_REPLICAS = ['replica'].
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['api.database.ReplicaRouter']
+# Seconds during which reads of a user who wrote are sent to 'default', replicas being possibly behind:
+REPLICA_STICKINESS = 5
+
+# Applied to every SQLite connection (see api/database.py):
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # milliseconds
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # negative values are in KiB
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory caches are per process: use a shared cache (Memcached, Redis) for the 'lists' alias in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'lists': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lists',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# Cache alias holding serialized issue and comment list pages (see api/cache.py)
+LIST_CACHE_ALIAS = 'lists'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -102,6 +148,48 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (see api/hashing.py): PBKDF2 iterations, worker threads checking and hashing passwords,
+# hashes waiting for a worker before logins and signups answer 503, retrying after PASSWORD_HASHING_RETRY_AFTER seconds.
+PASSWORD_HASHERS = [
+    'api.hashing.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASHING_ITERATIONS = 320000
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 32
+PASSWORD_HASHING_RETRY_AFTER = 1
+
+AUTHENTICATION_BACKENDS = ['api.authentication.PooledPasswordBackend']
+
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -134,12 +222,53 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES':
-        ('rest_framework_simplejwt.authentication.JWTAuthentication',),
-    #   'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    #   'PAGE_SIZE': 6,
+        ('api.authentication.StatelessJWTAuthentication',),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CreatedTimeCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
+
+# Seconds during which a worker trusts its cached token version of a user (see api/authentication.py).
+# Revocations are seen at once by all workers with a shared default cache, after this delay with local memory caches.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+# Issues read per query by project exports, their comments being read with one query per chunk:
+EXPORT_CHUNK_SIZE = 500
+
+# Background job queue (see api/jobs.py): seconds a worker holds a job before it is run again by another worker,
+# and retries of failed jobs, after JOB_RETRY_BACKOFF seconds doubled at each attempt.
+JOB_LEASE = 600
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 5
+JOB_RETRY_MAX_BACKOFF = 600
+
+# Bulk issue creations of more issues than the threshold are run by a background job:
+BULK_ISSUE_JOB_THRESHOLD = 200
+
+# Cache of the memberships of users, used by permission checks (see api/membership.py). Changes are seen at once
+# by all workers with a shared cache, after MEMBERSHIP_CACHE_TIMEOUT seconds with local memory caches.
+MEMBERSHIP_CACHE_ALIAS = 'default'
+MEMBERSHIP_CACHE_TIMEOUT = 300
+
+# Accounts with more issues and comments than the threshold are deleted by a background job, by chunks of rows:
+ACCOUNT_DELETION_CHUNK_THRESHOLD = 10000
+ACCOUNT_DELETION_CHUNK_SIZE = 1000
+
+# Change log entries read per request by /projects/<pk>/changes/, and seconds after which entries are deleted
+# by the compact_change_log management command (see api/changes.py):
+CHANGES_PAGE_SIZE = 1000
+CHANGE_LOG_RETENTION = 30 * 24 * 3600
+
+# Event streams of projects (see api/events.py and api/sse.py): backend bringing events to the subscribers
+# of a process, 'api.events.ChangeLogBackend' sharing the events of all workers by polling the change log
+# every EVENTS_POLL_INTERVAL seconds. Events waiting for a slow subscriber before its stream is closed,
+# seconds between heartbeats, and seconds after which clients reconnect.
+EVENTS_BACKEND = 'api.events.LocalBackend'
+EVENTS_POLL_INTERVAL = 1
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY = 3
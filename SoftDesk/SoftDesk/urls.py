@@ -18,15 +18,20 @@ from django.urls import path, include
 from rest_framework_nested import routers
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from api.views import ProjectViewSet, IssueViewSet, ContributorViewSet, CommentViewSet, SignUpAPIView, RGPDViewSet
+from api.async_views import AsyncProjectView, AsyncIssueView, AsyncCommentView
+from api.serializers import VersionedTokenObtainPairSerializer
+from api.views import ProjectViewSet, IssueViewSet, ContributorViewSet, CommentViewSet, SignUpAPIView, RGPDViewSet,\
+    SearchAPIView, JobViewSet
 
 
 """
 Use of rest_framework_nested for nested routers.
+Read-only async versions of project, issue and comment routes are served under async/ (see api/async_views.py).
 """
 router = routers.SimpleRouter()
 router.register('projects', ProjectViewSet, basename='projects')
 router.register('rgpd', RGPDViewSet, basename='rgpd')
+router.register('jobs', JobViewSet, basename='jobs')
 
 project_router = routers.NestedSimpleRouter(router, 'projects', lookup='project')
 project_router.register('issues', IssueViewSet, basename='issues')
@@ -37,14 +42,22 @@ issue_router.register('comments', CommentViewSet, basename='comments')
 
 urlpatterns = [
     # path('admin/', admin.site.urls),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', TokenObtainPairView.as_view(serializer_class=VersionedTokenObtainPairSerializer),
+         name='token_obtain_pair'),
     path('login/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('signup/', SignUpAPIView.as_view()),
+    path('search/', SearchAPIView.as_view()),
     path('rgpd/', RGPDViewSet.as_view({
         'get': 'retrieve',
         'put': 'update',
         'delete': 'destroy'
     })),
+    path('async/projects/', AsyncProjectView.as_view()),
+    path('async/projects/<int:pk>/', AsyncProjectView.as_view()),
+    path('async/projects/<int:project_pk>/issues/', AsyncIssueView.as_view()),
+    path('async/projects/<int:project_pk>/issues/<int:pk>/', AsyncIssueView.as_view()),
+    path('async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/', AsyncCommentView.as_view()),
+    path('async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/<int:pk>/', AsyncCommentView.as_view()),
     path('', include(router.urls)),
     path('', include(project_router.urls)),
     path('', include(issue_router.urls))
@@ -0,0 +1,110 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import StatelessJWTAuthentication
+from .database import is_sticky, replica_reads
+from .filters import IssueFilterBackend
+from .membership import MembershipResolver
+from .models import Project, Issue, Comment
+from .pagination import CreatedTimeCursorPagination
+from .permissions import IsProjectContributor
+from .serializers import ProjectSerializer, IssueSerializer, CommentSerializer
+from .views import IssueViewSet
+
+"""
+Async read endpoints for projects, issues and comments, served natively by the ASGI handler.
+- Django 4.0 has no async queryset API yet, so all database work of a request (authentication cache miss,
+permission checks, query and serialization) runs in a single sync_to_async hop, which is what the async
+queryset API of later Django versions does for each query.
+- Authentication, permissions, filters, pagination and serializers are the ones of the DRF viewsets,
+so responses are the same as on the synchronous routes. Reads go to the replicas as for the viewsets
+(see ReplicaReadMixin).
+See the compare_read_paths management command to compare both paths.
+"""
+
+
+class AsyncReadView:
+    """
+    Base class of async read views, answering GET with a paginated list or, if 'pk' is in url, a single object.
+    Django 4.0 class-based views can't be async, so as_view() returns an async function view.
+    """
+    serializer_class = None
+    filter_backends = []
+    ordering_choices = {}
+
+    def get_queryset(self):
+        raise NotImplementedError('AsyncReadView subclasses must define get_queryset()')
+
+    def check_permissions(self, request):
+        permission = IsProjectContributor()
+        if not permission.has_permission(request, self):
+            raise exceptions.PermissionDenied(permission.message)
+
+    @classmethod
+    def as_view(cls):
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+            self = cls()
+            self.kwargs = kwargs
+            return await sync_to_async(self.read)(request)
+        return view
+
+    def read(self, request):
+        request = Request(request, authenticators=[StatelessJWTAuthentication()])
+        self.request = request
+        try:
+            if request.user is None or not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            with replica_reads(not is_sticky(request.user.pk)):
+                self.check_permissions(request)
+                queryset = self.get_queryset()
+                for backend in self.filter_backends:
+                    queryset = backend().filter_queryset(request, queryset, self)
+                if 'pk' in self.kwargs:
+                    data = self.serializer_class(get_object_or_404(queryset, pk=self.kwargs['pk'])).data
+                else:
+                    paginator = CreatedTimeCursorPagination()
+                    page = paginator.paginate_queryset(queryset, request, view=self)
+                    data = paginator.get_paginated_response(self.serializer_class(page, many=True).data).data
+            return JsonResponse(data, encoder=JSONEncoder, safe=False)
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return JsonResponse(detail, status=e.status_code)
+
+
+class AsyncProjectView(AsyncReadView):
+    serializer_class = ProjectSerializer
+
+    def check_permissions(self, request):
+        # Project list is filtered by user, only project details require to be contributor.
+        if 'pk' in self.kwargs:
+            super().check_permissions(request)
+
+    def get_queryset(self):
+        projects_of_user = MembershipResolver.for_request(self.request).project_pks()
+        return ProjectSerializer.setup_eager_loading(Project.objects.filter(pk__in=projects_of_user))
+
+
+class AsyncIssueView(AsyncReadView):
+    serializer_class = IssueSerializer
+    filter_backends = [IssueFilterBackend]
+    ordering_choices = IssueViewSet.ordering_choices
+
+    def get_queryset(self):
+        return Issue.objects.filter(project_id=self.kwargs['project_pk'])
+
+
+class AsyncCommentView(AsyncReadView):
+    serializer_class = CommentSerializer
+
+    def get_queryset(self):
+        return Comment.objects.filter(issue_id=self.kwargs['issue_pk'])
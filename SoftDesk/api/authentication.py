@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .hashing import make_password, verify_password
+from .models import CustomUser
+
+"""
+Stateless JWT authentication.
+Tokens carry the user's is_active flag and token version (see VersionedTokenObtainPairSerializer),
+the only state checked at each request being the current token version of the user, which is cached.
+"""
+
+# Cached version of users who are inactive or deleted:
+REVOKED = -1
+
+
+def token_version_cache_key(user_pk) -> str:
+    return f'token_version:{user_pk}'
+
+
+def read_token_version(user_pk) -> int:
+    """
+    :return: the token version of the user in the database, or REVOKED if the user is inactive or does not exist.
+    """
+    row = CustomUser.objects.filter(pk=user_pk).values_list('token_version', 'is_active').first()
+    return row[0] if row and row[1] else REVOKED
+
+
+def get_token_version(user_pk) -> int:
+    """
+    :return: the current token version of the user, or REVOKED if the user is inactive or does not exist.
+    Cached for TOKEN_VERSION_CACHE_TIMEOUT seconds.
+    - The version read is only added if no version is cached, so that a version read before a revocation
+    never replaces the one written by revoke_tokens().
+    """
+    key = token_version_cache_key(user_pk)
+    version = cache.get(key)
+    if version is None:
+        version = read_token_version(user_pk)
+        if not cache.add(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def revoke_tokens(user_pk):
+    """
+    Invalidates all tokens issued to the user so far.
+    Must be called when the password or is_active of the user changes, or when the user is deleted.
+    The new version is written in the cache, now and once the current transaction is committed.
+    """
+    CustomUser.objects.filter(pk=user_pk).update(token_version=F('token_version') + 1)
+    version = read_token_version(user_pk)
+
+    def cache_version():
+        cache.set(token_version_cache_key(user_pk), version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    cache_version()
+    transaction.on_commit(cache_version)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication returning a CustomUser built from the token claims, without loading it from the database.
+    - Only id and is_active are loaded, other fields being deferred: they are fetched from the database
+    if a view happens to read them.
+    - The token is rejected if its token_version claim is not the current (cached) version of the user,
+    which is how password changes, deactivation and deletion revoke tokens.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_pk = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if not validated_token.get('is_active', True):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        current_version = get_token_version(user_pk)
+        if current_version == REVOKED:
+            raise AuthenticationFailed(_('User not found or inactive'), code='user_not_found')
+        if validated_token.get('token_version', 0) != current_version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        return CustomUser.from_db(
+            router.db_for_read(CustomUser), ['id', 'is_active', 'token_version'], [user_pk, True, current_version]
+        )
+
+
+class PooledPasswordBackend(ModelBackend):
+    """
+    Authentication backend of the login endpoint, checking passwords in the hashing pool (see hashing.py).
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(CustomUser.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = CustomUser._default_manager.get_by_natural_key(username)
+        except CustomUser.DoesNotExist:
+            # Hashing anyway, so that unknown emails can't be told apart by response time:
+            make_password(password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
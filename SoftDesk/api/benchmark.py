@@ -0,0 +1,276 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .membership import invalidate_memberships
+from .models import Project, Contributor, Issue, Comment, CustomUser, Job
+from .serializers import VersionedTokenObtainPairSerializer
+
+"""
+Benchmark harness driving every route of SoftDesk/urls.py through the test client on a synthetic dataset,
+recording SQL query counts and latencies per endpoint.
+Used by the benchmark_api management command, and by the test suite to check that query counts
+don't grow with the size of the dataset. Query counts, which are deterministic, are checked against
+the stored baseline; latencies depend on the machine and are only reported, unless asked for.
+"""
+
+PASSWORD = 'benchmark password'
+
+
+class Dataset:
+    """
+    Synthetic dataset, seeded with bulk inserts through the models.
+    - member is the author of the first project and contributor of all others,
+    and the author of the first issue and comment of the first project, and has a finished job.
+    - Every name is prefixed, so that several datasets can be seeded in the same database.
+    """
+    def __init__(self, scale=1, users=10, projects=5, contributors_per_project=3, issues_per_project=20,
+                 comments_per_issue=2, prefix='bench'):
+        self.users = max(users * scale, 2)
+        self.projects = projects * scale
+        self.contributors_per_project = min(max(contributors_per_project * scale, 2), self.users)
+        self.issues_per_project = issues_per_project * scale
+        self.comments_per_issue = comments_per_issue * scale
+        self.prefix = prefix
+        self.created = 0
+
+    def unique_name(self, name: str) -> str:
+        self.created += 1
+        return f'{self.prefix}-{name}-{self.created}'
+
+    def seed(self):
+        # Hashed once, hashing being by design the slowest part of user creation:
+        self.password = make_password(PASSWORD)
+        self.all_users = CustomUser.objects.bulk_create(
+            CustomUser(email=f'{self.prefix}-user{i}@softdesk.com', password=self.password)
+            for i in range(self.users)
+        )
+        self.member = self.all_users[0]
+        self.project = self.seed_project(self.member)
+        for i in range(1, self.projects):
+            project = self.seed_project(self.all_users[1 + i % (self.users - 1)])
+            Contributor.objects.create(
+                user_id=self.member, project_id=project, permission=Contributor.CONTRIBUTOR, role='Dev'
+            )
+        self.issue = self.project.issues.order_by('pk').first()
+        self.comment = self.issue.comments.order_by('pk').first()
+        # Finished, so that no worker runs it:
+        self.job = Job.objects.create(
+            task='reconcile_issue_stats', status=Job.DONE, attempts=1, result=0, user_id=self.member,
+            finished_time=timezone.now()
+        )
+        return self
+
+    def seed_project(self, author, issues=None, comments_per_issue=None):
+        """
+        Creates a project of author, with contributors, issues and comments.
+        Issues and comments are written by author.
+        """
+        project = Project.objects.create(
+            title=self.unique_name('project'), description='Benchmark project', type=Project.BACK_END,
+            author_user_id=author
+        )
+        others = [user for user in getattr(self, 'all_users', []) if user != author and user != self.member]
+        contributors = Contributor.objects.bulk_create(
+            [Contributor(user_id=author, project_id=project, permission=Contributor.AUTHOR)]
+            + [
+                Contributor(user_id=user, project_id=project, permission=Contributor.CONTRIBUTOR, role='Dev')
+                for user in others[:self.contributors_per_project - 2]
+            ]
+        )
+        invalidate_memberships(contributor.user_id_id for contributor in contributors)
+        issues = Issue.objects.bulk_create(
+            Issue(
+                title=f'Issue {i}', description=f'Benchmark issue number {i}', tag=Issue.BUG,
+                priority=Issue.PRIORITY_CHOICES[i % 3][0], status=Issue.STATUS_CHOICES[i % 3][0],
+                project_id=project, author_user_id=author, assignee_user_id=author
+            )
+            for i in range(self.issues_per_project if issues is None else issues)
+        )
+        Comment.objects.bulk_create(
+            Comment(description=f'Comment {i}', issue_id=issue, author_user_id=author)
+            for issue in issues
+            for i in range(self.comments_per_issue if comments_per_issue is None else comments_per_issue)
+        )
+        return project
+
+    def create_user(self):
+        return CustomUser.objects.create(email=f"{self.unique_name('user')}@softdesk.com", password=self.password)
+
+    def create_issue(self):
+        return Issue.objects.create(
+            title=self.unique_name('issue'), tag=Issue.TACHE, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.member, assignee_user_id=self.member
+        )
+
+    def create_comment(self):
+        return Comment.objects.create(
+            description=self.unique_name('comment'), issue_id=self.issue, author_user_id=self.member
+        )
+
+    def issue_data(self):
+        return {'title': self.unique_name('issue'), 'tag': Issue.TACHE, 'priority': Issue.FAIBLE,
+                'status': Issue.A_FAIRE, 'assignee_user_id': self.member.pk}
+
+
+def endpoints(dataset):
+    """
+    :return: list of (name, expected status, prepare) for every route, prepare() doing the untimed setup
+    of a request and returning (method, path, data, user making the request or None if anonymous).
+    """
+    d = dataset
+    project = f'/projects/{d.project.pk}/'
+    issue = f'{project}issues/{d.issue.pk}/'
+    comment = f'{issue}comments/{d.comment.pk}/'
+
+    def get(path):
+        return lambda: ('get', path, None, d.member)
+
+    def create_contributor():
+        return Contributor.objects.create(user_id=d.create_user(), project_id=d.project, permission='CO')
+
+    def create_user_with_project():
+        user = d.create_user()
+        d.seed_project(user)
+        return user
+
+    return [
+        ('signup', 201, lambda: ('post', '/signup/', {
+            'email': f"{d.unique_name('signup')}@softdesk.com", 'password': PASSWORD}, None)),
+        ('login', 200, lambda: ('post', '/login/', {'email': d.member.email, 'password': PASSWORD}, None)),
+        ('login-refresh', 200, lambda: ('post', '/login/refresh/', {
+            'refresh': str(VersionedTokenObtainPairSerializer.get_token(d.member))}, None)),
+        ('search', 200, get('/search/?q=benchmark issue')),
+        ('rgpd-retrieve', 200, get(f'/rgpd/{d.member.pk}/')),
+        ('rgpd-update', 200, lambda: ('put', f'/rgpd/{d.member.pk}/', {'first_name': 'member'}, d.member)),
+        ('rgpd-destroy', 204, lambda: (lambda user: ('delete', f'/rgpd/{user.pk}/', None, user))(
+            create_user_with_project())),
+        ('project-list', 200, get('/projects/')),
+        ('project-retrieve', 200, get(project)),
+        ('project-create', 201, lambda: ('post', '/projects/', {
+            'title': d.unique_name('project'), 'description': 'New', 'type': Project.IOS}, d.member)),
+        ('project-update', 200, lambda: ('put', project, {'description': d.unique_name('description')}, d.member)),
+        ('project-export', 200, get(f'{project}export/')),
+        ('project-changes', 200, get(f'{project}changes/?since=0')),
+        ('project-stats', 200, get(f'{project}stats/')),
+        ('project-destroy', 204, lambda: ('delete', f'/projects/{d.seed_project(d.member).pk}/', None, d.member)),
+        ('contributor-list', 200, get(f'{project}users/')),
+        ('contributor-retrieve', 200, lambda: (
+            'get', f'{project}users/{d.project.users.order_by("pk").first().pk}/', None, d.member)),
+        ('contributor-create', 201, lambda: ('post', f'{project}users/', {
+            'user_id': d.create_user().pk, 'role': 'Dev'}, d.member)),
+        ('contributor-destroy', 204, lambda: ('delete', f'{project}users/{create_contributor().pk}/', None, d.member)),
+        ('issue-list', 200, get(f'{project}issues/')),
+        ('issue-list-filtered', 200, get(f'{project}issues/?status={Issue.EN_COURS}&ordering=-created_time')),
+        ('issue-retrieve', 200, get(issue)),
+        ('issue-create', 201, lambda: ('post', f'{project}issues/', d.issue_data(), d.member)),
+        ('issue-update', 200, lambda: ('put', issue, {'description': d.unique_name('description')}, d.member)),
+        ('issue-destroy', 204, lambda: ('delete', f'{project}issues/{d.create_issue().pk}/', None, d.member)),
+        ('issue-bulk-create', 201, lambda: (
+            'post', f'{project}issues/bulk/', [d.issue_data() for _ in range(10)], d.member)),
+        ('issue-bulk-update', 200, lambda: ('patch', f'{project}issues/bulk/', [
+            {'id': d.create_issue().pk, 'status': Issue.TERMINE} for _ in range(10)], d.member)),
+        ('comment-list', 200, get(f'{issue}comments/')),
+        ('comment-retrieve', 200, get(comment)),
+        ('comment-create', 201, lambda: ('post', f'{issue}comments/', {
+            'description': d.unique_name('comment')}, d.member)),
+        ('comment-update', 200, lambda: ('put', comment, {'description': d.unique_name('comment')}, d.member)),
+        ('comment-destroy', 204, lambda: (
+            'delete', f'{issue}comments/{d.create_comment().pk}/', None, d.member)),
+        ('job-retrieve', 200, get(f'/jobs/{d.job.pk}/')),
+        ('async-project-list', 200, get('/async/projects/')),
+        ('async-project-retrieve', 200, get(f'/async{project}')),
+        ('async-issue-list', 200, get(f'/async{project}issues/')),
+        ('async-issue-retrieve', 200, get(f'/async{issue}')),
+        ('async-comment-list', 200, get(f'/async{issue}comments/')),
+        ('async-comment-retrieve', 200, get(f'/async{comment}')),
+    ]
+
+
+def run(dataset, iterations=10):
+    """
+    Requests every endpoint iterations times.
+    :return: dict of {'queries': max query count, 'p50': ms, 'p95': ms} by endpoint name.
+    :raise AssertionError: if an endpoint answers an unexpected status.
+    """
+    client = APIClient()
+    tokens = {}
+    results = {}
+    for name, expected_status, prepare in endpoints(dataset):
+        latencies = []
+        queries = 0
+        for _ in range(iterations):
+            method, path, data, user = prepare()
+            if user is None:
+                client.credentials()
+            else:
+                if user.pk not in tokens:
+                    tokens[user.pk] = VersionedTokenObtainPairSerializer.get_token(user).access_token
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens[user.pk]}')
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, data, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected_status:
+                raise AssertionError(f'{name}: {method.upper()} {path} answered {response.status_code}')
+            queries = max(queries, len(captured.captured_queries))
+        latencies.sort()
+        results[name] = {
+            'queries': queries,
+            'p50': round(statistics.median(latencies), 2),
+            'p95': round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2),
+        }
+    return results
+
+
+def growing_query_counts(small_results, large_results):
+    """
+    :return: names of endpoints running more queries on the larger dataset.
+    """
+    return [name for name in small_results if large_results[name]['queries'] > small_results[name]['queries']]
+
+
+def missing_from_baseline(results, baseline):
+    """
+    :return: names of endpoints which have no baseline entry, and would not be checked.
+    """
+    return [name for name in results if name not in baseline]
+
+
+def over_baseline_queries(results, baseline):
+    """
+    :return: names of endpoints running more queries than in the baseline.
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result['queries'] > baseline[name]['queries']
+    ]
+
+
+def over_baseline(results, baseline, tolerance):
+    """
+    :return: names of endpoints whose p95 latency is over the baseline p95 by more than tolerance (0.5 for 50%).
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result['p95'] > baseline[name]['p95'] * (1 + tolerance)
+    ]
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
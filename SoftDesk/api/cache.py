@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ListCache:
+    """
+    Wrapper around the cache alias named by the LIST_CACHE_ALIAS setting,
+    counting hits and misses in the cache itself so that counters are shared by all workers
+    when the alias is a shared cache.
+    """
+    HITS_KEY = 'list_cache:hits'
+    MISSES_KEY = 'list_cache:misses'
+
+    @property
+    def cache(self):
+        return caches[settings.LIST_CACHE_ALIAS]
+
+    def get(self, key):
+        value = self.cache.get(key)
+        self._increment(self.MISSES_KEY if value is None else self.HITS_KEY)
+        return value
+
+    def set(self, key, value):
+        self.cache.set(key, value)
+
+    def _increment(self, counter_key):
+        try:
+            self.cache.incr(counter_key)
+        except ValueError:
+            # Counter was never set or was evicted:
+            self.cache.add(counter_key, 1, timeout=None)
+
+    def stats(self) -> dict:
+        counters = self.cache.get_many([self.HITS_KEY, self.MISSES_KEY])
+        return {'hits': counters.get(self.HITS_KEY, 0), 'misses': counters.get(self.MISSES_KEY, 0)}
+
+
+list_cache = ListCache()
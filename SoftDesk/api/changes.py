@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Project, Contributor, Issue, Comment, Change, CollectionVersion
+from .serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+
+"""
+Incremental sync of a project from the Change log, written by triggers in migration 0011_change.
+- Clients keep the cursor of the last change they read, and ask for the changes after it: entries of the same row
+are merged into one, with the current state of the row, or a tombstone if it was deleted.
+- Entries older than the retention are compacted. Cursors from before the last compaction are rejected,
+the client having to download the project again.
+"""
+
+# CollectionVersion row holding the id of the last compacted entry:
+HORIZON_KEY = 'changes:horizon'
+
+SERIALIZERS = {
+    Change.PROJECT: (Project, ProjectSerializer),
+    Change.CONTRIBUTOR: (Contributor, ContributorSerializer),
+    Change.ISSUE: (Issue, IssueSerializer),
+    Change.COMMENT: (Comment, CommentSerializer),
+}
+
+LOG_ISSUES_QUERY = """
+    INSERT INTO api_change(project_pk, model, object_pk, action, created_time)
+    SELECT project_id_id, 'issue', id, 'create', %s FROM api_issue WHERE id BETWEEN %s AND %s ORDER BY id
+"""
+
+LOG_COMMENTS_QUERY = """
+    INSERT INTO api_change(project_pk, model, object_pk, action, created_time)
+    SELECT api_issue.project_id_id, 'comment', api_comment.id, 'create', %s
+    FROM api_comment INNER JOIN api_issue ON api_issue.id = api_comment.issue_id_id
+    WHERE api_comment.id BETWEEN %s AND %s ORDER BY api_comment.id
+"""
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def horizon() -> int:
+    """
+    :return: id of the last compacted entry, 0 if the log was never compacted.
+    """
+    return CollectionVersion.get(HORIZON_KEY)[0]
+
+
+def log_inserted(issue_pks: tuple = None, comment_pks: tuple = None):
+    """
+    Logs the creation of issues and comments inserted with the change triggers suspended (see importer.py).
+    :param issue_pks: (first pk, last pk) range of the inserted issues.
+    :param comment_pks: (first pk, last pk) range of the inserted comments.
+    """
+    created_time = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        if issue_pks:
+            cursor.execute(LOG_ISSUES_QUERY, [created_time, *issue_pks])
+        if comment_pks:
+            cursor.execute(LOG_COMMENTS_QUERY, [created_time, *comment_pks])
+
+
+def changes_since(project_pk: int, since: int, limit: int):
+    """
+    Reads at most limit entries of the project after the since cursor.
+    :return: (list of changes, cursor of the last entry read, True if there are more entries after it),
+    changes being dicts of 'cursor', 'type', 'id', 'action' and 'data', ordered by cursor.
+    - Entries of the same row are merged into the last one, with action 'create' if the row was created since,
+    and 'data' holding the current state of the row, or None if it was deleted.
+    :raise CursorExpired: if entries after since were compacted.
+    """
+    if since < horizon():
+        raise CursorExpired()
+    entries = list(
+        Change.objects.filter(project_pk=project_pk, id__gt=since).order_by('id')
+        .values_list('id', 'model', 'object_pk', 'action')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    rows = {}
+    for cursor, model, object_pk, action in entries:
+        created = action == Change.CREATE or rows.get((model, object_pk), (None, False))[1]
+        rows[(model, object_pk)] = (cursor, created, action == Change.DELETE)
+    # A compaction after the check leaves a gap between since and the first entry read:
+    if since < horizon():
+        raise CursorExpired()
+
+    data = {}
+    for model, (model_class, serializer_class) in SERIALIZERS.items():
+        pks = [
+            object_pk for (row_model, object_pk), (_, _, deleted) in rows.items() if row_model == model and not deleted
+        ]
+        if not pks:
+            continue
+        queryset = model_class.objects.filter(pk__in=pks)
+        if model_class is Project:
+            queryset = ProjectSerializer.setup_eager_loading(queryset)
+        data.update(((model, instance.pk), serializer_class(instance).data) for instance in queryset)
+
+    changes = []
+    for (model, object_pk), (cursor, created, deleted) in sorted(rows.items(), key=lambda item: item[1][0]):
+        row_data = None if deleted else data.get((model, object_pk))
+        if row_data is None:
+            action = Change.DELETE
+        else:
+            action = Change.CREATE if created else Change.UPDATE
+        changes.append({'cursor': cursor, 'type': model, 'id': object_pk, 'action': action, 'data': row_data})
+    return changes, entries[-1][0] if entries else since, has_more
+
+
+def compact(retention: int) -> int:
+    """
+    Deletes the entries older than retention seconds, and moves the horizon to the last one deleted.
+    Ids growing with time, entries are deleted by id range, without index on created_time.
+    :return: number of deleted entries.
+    """
+    with transaction.atomic():
+        first_kept = Change.objects.filter(
+            created_time__gte=timezone.now() - timedelta(seconds=retention)
+        ).order_by('id').values_list('id', flat=True).first()
+        if first_kept is None:
+            first_kept = (Change.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        last_deleted = first_kept - 1
+        if last_deleted <= horizon():
+            return 0
+        deleted, _ = Change.objects.filter(id__lte=last_deleted).delete()
+        CollectionVersion.objects.update_or_create(
+            key=HORIZON_KEY, defaults={'version': last_deleted, 'modified_time': timezone.now()}
+        )
+        return deleted
@@ -0,0 +1,99 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+"""
+Database connection setup. Registered in ApiConfig.ready().
+- SQLITE_PRAGMAS are applied to every new SQLite connection: WAL journaling lets readers run alongside the writer,
+and the busy timeout makes writers wait for the lock instead of failing with "database is locked".
+- Persistent connections (CONN_MAX_AGE) are checked before their first use in a request if CONN_HEALTH_CHECKS
+is set, as Django does itself from 4.1 on.
+See the stress_sqlite management command to compare the tuned profile with SQLite defaults.
+- Reads of list and retrieve actions and permission lookups can be sent to the DATABASE_REPLICAS aliases
+by ReplicaRouter, other queries running on the primary 'default' database.
+"""
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def pragma_statements(pragmas: dict):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """
+    Closes persistent connections which are no longer usable, so that the request opens a new one.
+    """
+    if django.VERSION >= (4, 1):
+        return
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get('CONN_HEALTH_CHECKS') and connection.connection is not None
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+def sticky_key(user_pk) -> str:
+    return f'replica-sticky:{user_pk}'
+
+
+def mark_sticky(user_pk):
+    """
+    Sends reads of the user to the primary database for REPLICA_STICKINESS seconds,
+    so that the user reads their own writes even if replicas lag behind.
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set(sticky_key(user_pk), True, settings.REPLICA_STICKINESS)
+
+
+def is_sticky(user_pk) -> bool:
+    return bool(settings.DATABASE_REPLICAS) and cache.get(sticky_key(user_pk), False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Context in which ReplicaRouter sends reads to a replica, if enabled.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads made in a replica_reads() context to one of the DATABASE_REPLICAS,
+    chosen at random. Everything else, writes included, goes to the primary 'default' database.
+    """
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary:
+        return True
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .membership import invalidate_memberships
+from .models import Project, Contributor, Issue, Comment, CustomUser, Job
+
+"""
+Set-based deletion of a user account and of the projects of which the user is the author.
+Rows are deleted with DELETE statements in dependency order instead of Django's collector, which loads
+every related object in Python. Signals are therefore not sent, database triggers are run as usual.
+"""
+
+
+def account_deletion_steps(user_pk: int):
+    """
+    :return: querysets to delete in order, so that no row is deleted before the rows referencing it.
+    """
+    authored_projects = Q(project_id__author_user_id=user_pk)
+    return [
+        Comment.objects.filter(
+            Q(issue_id__project_id__author_user_id=user_pk) | Q(issue_id__author_user_id=user_pk)
+            | Q(author_user_id=user_pk)
+        ),
+        Issue.objects.filter(authored_projects | Q(author_user_id=user_pk)),
+        Contributor.objects.filter(authored_projects | Q(user_id=user_pk)),
+        Project.objects.filter(author_user_id=user_pk),
+        CustomUser.groups.through.objects.filter(customuser_id=user_pk),
+        CustomUser.user_permissions.through.objects.filter(customuser_id=user_pk),
+    ]
+
+
+def account_size(user_pk: int) -> int:
+    """
+    :return: number of issues and comments deleted along with the account.
+    """
+    steps = account_deletion_steps(user_pk)
+    return steps[0].count() + steps[1].count()
+
+
+def delete_account(user_pk: int, chunk_size: int = None):
+    """
+    Deletes the user, the projects of which the user is the author with all their contributors, issues
+    and comments, and every issue and comment the user wrote elsewhere.
+    :param chunk_size: if given, rows are deleted by chunks of chunk_size rows, each in its own transaction,
+    so that other writers are not blocked for the whole deletion. Deletion can then be resumed
+    by calling delete_account again if it was interrupted.
+    """
+    # Statements don't send signals, so members of the deleted projects are invalidated here:
+    members = set(
+        Contributor.objects.filter(project_id__author_user_id=user_pk).values_list('user_id', flat=True).distinct()
+    )
+    members.add(user_pk)
+    if chunk_size is None:
+        with transaction.atomic():
+            for queryset in account_deletion_steps(user_pk):
+                queryset._raw_delete(queryset.db)
+            Issue.objects.filter(assignee_user_id=user_pk).update(assignee_user_id=None)
+            Job.objects.filter(user_id=user_pk).update(user_id=None)
+            CustomUser.objects.filter(pk=user_pk)._raw_delete(CustomUser.objects.db)
+            invalidate_memberships(members)
+        return
+
+    for queryset in account_deletion_steps(user_pk):
+        while True:
+            with transaction.atomic():
+                chunk = list(queryset.values_list('pk', flat=True)[:chunk_size])
+                if not chunk:
+                    break
+                queryset.model.objects.filter(pk__in=chunk)._raw_delete(queryset.db)
+                if queryset.model is Contributor:
+                    invalidate_memberships(members)
+    while True:
+        with transaction.atomic():
+            chunk = list(Issue.objects.filter(assignee_user_id=user_pk).values_list('pk', flat=True)[:chunk_size])
+            if not chunk:
+                break
+            Issue.objects.filter(pk__in=chunk).update(assignee_user_id=None)
+    with transaction.atomic():
+        Job.objects.filter(user_id=user_pk).update(user_id=None)
+        CustomUser.objects.filter(pk=user_pk)._raw_delete(CustomUser.objects.db)
+    invalidate_memberships(members)
+
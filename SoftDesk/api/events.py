@@ -0,0 +1,181 @@
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Max
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Change
+
+"""
+Publish/subscribe of issue, comment and contributor events of projects, streamed to clients by api/sse.py.
+- The hub fans events out to the subscribers of a project in this process, each subscriber being a bounded
+asyncio queue read by its connection: an idle connection costs a queue and a suspended coroutine.
+- Events reach the hub through the backend named by EVENTS_BACKEND:
+    - LocalBackend publishes the events of the writes made by the API views of this process
+    (see EventPublishingMixin). Enough for a single worker, writes of other processes and jobs being missed.
+    - ChangeLogBackend reads the Change log written by triggers (see changes.py), with one query
+    every EVENTS_POLL_INTERVAL seconds per process, so that workers share the events of all writes.
+- Events are dicts of 'type', 'id' and 'action' of the written row, plus 'cursor' with ChangeLogBackend:
+clients read the rows, or the changes endpoint, to get the data.
+"""
+
+EVENT_TYPES = [Change.ISSUE, Change.COMMENT, Change.CONTRIBUTOR]
+
+# Put in the queue of a subscriber which didn't keep up, its connection being closed:
+OVERFLOW = {'type': 'overflow'}
+
+
+class Subscription:
+    def __init__(self, project_pk: int, queue_size: int):
+        self.project_pk = project_pk
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def deliver(self, event):
+        """
+        Puts event in the queue, replacing its content with OVERFLOW if it is full. Runs in the event loop.
+        """
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = OVERFLOW
+        self.queue.put_nowait(event)
+
+
+class Hub:
+    """
+    Subscribers of this process by project. publish() can be called from any thread.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, project_pk: int) -> Subscription:
+        """
+        To be called from the event loop of the connection.
+        """
+        subscription = Subscription(project_pk, settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.setdefault(project_pk, set()).add(subscription)
+        get_backend().subscribed(self)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.project_pk, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.project_pk, None)
+
+    def project_pks(self) -> list:
+        with self.lock:
+            return list(self.subscriptions)
+
+    def publish(self, project_pk: int, event: dict):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(project_pk, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Loop closed, the subscription is being removed:
+                pass
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    reads_change_log = False
+
+    def subscribed(self, hub: Hub):
+        pass
+
+
+class ChangeLogBackend:
+    """
+    Polls the change log for the projects having subscribers, in a task of the event loop running
+    while there are subscribers. The cursor is kept by the backend, from the last entry in the log when the first
+    task starts.
+    """
+    reads_change_log = True
+
+    def __init__(self):
+        self.task = None
+        self.cursor = None
+
+    def subscribed(self, hub: Hub):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self.poll(hub))
+
+    async def poll(self, hub: Hub):
+        # A restarted task resumes after the last entry read, so that no change written meanwhile is missed:
+        if self.cursor is None:
+            self.cursor = await sync_to_async(self.last_cursor)()
+        while True:
+            project_pks = hub.project_pks()
+            if not project_pks:
+                return
+            for project_pk, event in await sync_to_async(self.read)(project_pks):
+                hub.publish(project_pk, event)
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+
+    @staticmethod
+    def last_cursor() -> int:
+        return Change.objects.aggregate(last=Max('id'))['last'] or 0
+
+    def read(self, project_pks: list) -> list:
+        """
+        :return: list of (project pk, event) of the entries of the projects after the cursor,
+        the cursor being moved to the last one. Entries are read with the (project_pk, id) index.
+        """
+        entries = list(
+            Change.objects.filter(project_pk__in=project_pks, model__in=EVENT_TYPES, id__gt=self.cursor)
+            .order_by('id').values_list('id', 'project_pk', 'model', 'object_pk', 'action')
+        )
+        if entries:
+            self.cursor = entries[-1][0]
+        return [
+            (project_pk, {'type': model, 'id': object_pk, 'action': action, 'cursor': cursor})
+            for cursor, project_pk, model, object_pk, action in entries
+        ]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.EVENTS_BACKEND)()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'EVENTS_BACKEND':
+        with _backend_lock:
+            _backend = None
+
+
+def publish(project_pk: int, event_type: str, object_pks: list, action: str):
+    """
+    Publishes the events of the written rows once the current transaction is committed,
+    unless the backend reads them from the change log.
+    """
+    if get_backend().reads_change_log:
+        return
+
+    def send():
+        for object_pk in object_pks:
+            hub.publish(project_pk, {'type': event_type, 'id': object_pk, 'action': action})
+    transaction.on_commit(send)
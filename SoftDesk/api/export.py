@@ -0,0 +1,83 @@
+import csv
+import json
+from collections import defaultdict
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Issue, Comment
+
+"""
+Streaming export of the issues of a project with their comments, as NDJSON or CSV.
+Issues are read with a server-side iterator and their comments fetched with one query per chunk of issues,
+so that memory use depends on the chunk size and not on the size of the project.
+"""
+
+ISSUE_FIELDS = [
+    'id', 'title', 'description', 'tag', 'priority', 'status', 'author_user_id', 'assignee_user_id', 'created_time'
+]
+COMMENT_FIELDS = ['id', 'description', 'author_user_id', 'created_time']
+CSV_HEADER = [f'issue_{field}' for field in ISSUE_FIELDS] + [f'comment_{field}' for field in COMMENT_FIELDS]
+
+
+def issues_with_comments(project_pk: int, chunk_size: int):
+    """
+    :return: iterator over the issues of the project as dicts, ordered by id, each one with the list
+    of its comments ordered by id under 'comments'.
+    """
+    chunk = []
+    issues = Issue.objects.filter(project_id=project_pk).order_by('id').values(*ISSUE_FIELDS)
+    for issue in issues.iterator(chunk_size=chunk_size):
+        chunk.append(issue)
+        if len(chunk) == chunk_size:
+            yield from with_comments(chunk)
+            chunk = []
+    if chunk:
+        yield from with_comments(chunk)
+
+
+def with_comments(issues: list):
+    comments = defaultdict(list)
+    rows = Comment.objects.filter(issue_id__in=[issue['id'] for issue in issues]).order_by('issue_id', 'id')
+    for comment in rows.values('issue_id', *COMMENT_FIELDS).iterator():
+        comments[comment.pop('issue_id')].append(comment)
+    for issue in issues:
+        issue['comments'] = comments[issue['id']]
+        yield issue
+
+
+def to_ndjson(issues):
+    encoder = JSONEncoder()
+    for issue in issues:
+        yield json.dumps(issue, default=encoder.default) + '\n'
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, for csv.writer to produce lines without buffering them.
+    """
+    def write(self, value):
+        return value
+
+
+def to_csv(issues):
+    """
+    One line per comment, with the fields of its issue, issues without comments having empty comment fields.
+    """
+    encoder = JSONEncoder()
+
+    def values(row, fields):
+        return [encoder.default(row[field]) if hasattr(row[field], 'isoformat') else row[field] for field in fields]
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for issue in issues:
+        issue_values = values(issue, ISSUE_FIELDS)
+        for comment in issue['comments'] or [None]:
+            comment_values = values(comment, COMMENT_FIELDS) if comment else [''] * len(COMMENT_FIELDS)
+            yield writer.writerow(issue_values + comment_values)
+
+
+FORMATS = {
+    'ndjson': (to_ndjson, 'application/x-ndjson'),
+    'csv': (to_csv, 'text/csv'),
+}
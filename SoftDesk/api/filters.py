@@ -0,0 +1,63 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Issue
+
+# SQLite integers, as other databases' bigint, are signed 64-bit:
+MAX_ID = 2 ** 63 - 1
+
+
+class IssueFilterBackend(BaseFilterBackend):
+    """
+    Filters issues of the project with query parameters:
+    - status, priority and tag: one of the choices defined on Issue.
+    - assignee_user_id and author_user_id: pk of a user.
+    - created_after and created_before: ISO 8601 datetimes, inclusive.
+    Every single filter is backed by a (project_id, <field>, created_time, id) index (see Issue.Meta).
+    """
+    choice_filters = {
+        'status': Issue.STATUS_CHOICES,
+        'priority': Issue.PRIORITY_CHOICES,
+        'tag': Issue.TAG_CHOICES,
+    }
+    user_filters = ['assignee_user_id', 'author_user_id']
+    time_filters = {
+        'created_after': 'created_time__gte',
+        'created_before': 'created_time__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        errors = {}
+        params = request.query_params
+
+        for param, choices in self.choice_filters.items():
+            if param in params:
+                if params[param] not in dict(choices):
+                    errors[param] = f"Must be one of: {', '.join(dict(choices))}."
+                filters[param] = params[param]
+
+        for param in self.user_filters:
+            if param in params:
+                try:
+                    filters[param] = int(params[param])
+                    if not 0 <= filters[param] <= MAX_ID:
+                        raise ValueError()
+                except ValueError:
+                    errors[param] = "Must be a user id."
+
+        for param, lookup in self.time_filters.items():
+            if param in params:
+                try:
+                    value = parse_datetime(params[param])
+                except ValueError:
+                    # Well formed, but not a valid date or time:
+                    value = None
+                if value is None:
+                    errors[param] = "Must be an ISO 8601 datetime."
+                filters[lookup] = value
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters)
@@ -0,0 +1,131 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import CustomUser
+
+"""
+Password hashing and verification in a bounded pool of PASSWORD_HASHING_WORKERS threads, used by signup, password
+changes and login (see authentication.PooledPasswordBackend).
+- PBKDF2 runs in OpenSSL without holding the GIL, so the pool caps the CPU taken by hashing whatever the number
+of concurrent logins and signups, leaving the rest for other endpoints.
+- At most PASSWORD_HASHING_QUEUE hashes wait for a worker, requests beyond answering 503 with Retry-After.
+- With PASSWORD_HASHING_WORKERS = 0, hashing runs inline in the request thread.
+"""
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with PASSWORD_HASHING_ITERATIONS iterations. The algorithm name is unchanged,
+    so that existing hashes are verified, and upgraded on login when the number of iterations changes.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING_ITERATIONS
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins and signups in progress, retry later.'
+    default_code = 'password_hashing_unavailable'
+
+    def __init__(self):
+        super().__init__()
+        # Sent as Retry-After header by DRF's exception handler:
+        self.wait = settings.PASSWORD_HASHING_RETRY_AFTER
+
+
+class HashingPool:
+    def __init__(self, workers: int, queue_size: int):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hashing') if workers else None
+        self.slots = threading.BoundedSemaphore(workers + queue_size) if workers else None
+
+    def submit(self, function, *args):
+        """
+        :return: future of function(*args) run by a worker.
+        :raise PasswordHashingUnavailable: if all workers are busy and the queue is full.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingUnavailable()
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(lambda done: self.slots.release())
+        return future
+
+    def run(self, function, *args):
+        if self.executor is None:
+            return function(*args)
+        return self.submit(function, *args).result()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HashingPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE)
+        return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_QUEUE'):
+        with _pool_lock:
+            _pool = None
+
+
+def make_password(password: str) -> str:
+    return get_pool().run(hashers.make_password, password)
+
+
+def needs_rehash(encoded: str) -> bool:
+    """
+    :return: True if the hash was made with another hasher than the preferred one, or other parameters.
+    """
+    preferred = hashers.get_hasher()
+    hasher = hashers.identify_hasher(encoded)
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def rehash(user_pk: int, password: str, encoded: str):
+    """
+    Replaces the hash of the user, unless the password was changed since it was read.
+    """
+    CustomUser.objects.filter(pk=user_pk, password=encoded).update(password=hashers.make_password(password))
+
+
+def rehash_in_thread(user_pk: int, password: str, encoded: str):
+    try:
+        rehash(user_pk, password, encoded)
+    finally:
+        connection.close()
+
+
+def verify_password(user, password: str) -> bool:
+    """
+    Checks the password of the user, upgrading an outdated hash in the background if it is right
+    (inline if hashing runs inline). The upgrade is skipped if the pool is saturated, to be done on a later login.
+    """
+    pool = get_pool()
+    encoded = user.password
+    if not pool.run(hashers.check_password, password, encoded):
+        return False
+    if needs_rehash(encoded):
+        if pool.executor is None:
+            rehash(user.pk, password, encoded)
+        else:
+            try:
+                pool.submit(rehash_in_thread, user.pk, password, encoded)
+            except PasswordHashingUnavailable:
+                pass
+    return True
@@ -0,0 +1,294 @@
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import log_inserted
+from .membership import invalidate_memberships
+from .models import Project, Contributor, Issue, Comment, CustomUser, ImportCheckpoint
+from .search import index_rows
+from .stats import count_inserted
+
+"""
+Bulk import of projects, contributors, issues and comments from NDJSON, used by the import_ndjson management command.
+Each line holds a project, or an issue of the last project above it, users being given by email:
+{"project": {"title": ..., "description": ..., "type": ..., "author": ...,
+"contributors": [{"email": ..., "role": ...}]}}
+{"issue": {"title": ..., "description": ..., "tag": ..., "priority": ..., "status": ..., "author": ...,
+"assignee": ..., "comments": [{"description": ..., "author": ...}]}}
+- Lines are validated and inserted with bulk_create by batches, each batch in its own transaction along with
+the checkpoint of the import, so that an interrupted import resumes after the last committed batch.
+- Invalid lines are reported and skipped, along with the issues of a skipped project.
+- On SQLite, row triggers maintaining the search index, collection versions, change log and issue stats
+are suspended during the inserts of a batch, their work being done once per batch with set-based statements.
+"""
+
+SUSPENDED_TRIGGERS = [
+    'api_issue_search_insert',
+    'api_comment_search_insert',
+    'api_issue_version_insert',
+    'api_comment_version_insert',
+    'api_contributor_version_insert',
+    'api_issue_change_insert',
+    'api_comment_change_insert',
+    'api_issue_stats_insert',
+]
+
+VERSION_UPSERT = (
+    "INSERT INTO api_collectionversion(key, version, modified_time) VALUES (%s, 1, %s) "
+    "ON CONFLICT(key) DO UPDATE SET version = version + 1, modified_time = excluded.modified_time"
+)
+
+
+@contextmanager
+def suspended_triggers():
+    """
+    Drops SUSPENDED_TRIGGERS, and creates them again on exit.
+    To be used in a transaction: SQLite DDL being transactional, other connections never see the triggers missing,
+    and triggers are restored by the rollback if an error occurs.
+    """
+    with connection.cursor() as cursor:
+        placeholders = ', '.join(['%s'] * len(SUSPENDED_TRIGGERS))
+        cursor.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})", SUSPENDED_TRIGGERS
+        )
+        statements = [row[0] for row in cursor.fetchall()]
+        for name in SUSPENDED_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+    yield
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def bump_versions(keys):
+    """
+    Increments the CollectionVersion rows of keys, as the suspended version triggers would have.
+    """
+    modified_time = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.executemany(VERSION_UPSERT, [(key, modified_time) for key in sorted(keys)])
+
+
+def first_error(error: ValidationError) -> str:
+    return '; '.join(f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items())
+
+
+class Importer:
+    """
+    Imports NDJSON lines given by run(), reporting invalid lines with report(line number, message).
+    :param source: name of the import, keying its checkpoint.
+    :param create_users: if True, unknown emails are imported as users with an unusable password,
+    otherwise lines using them are invalid.
+    """
+    def __init__(self, source: str, batch_size: int = 1000, create_users: bool = False, report=None):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.report = report or (lambda number, message: None)
+        self.counts = Counter()
+        self.users = dict(CustomUser.objects.values_list('email', 'pk'))
+        self.checkpoint, created = ImportCheckpoint.objects.get_or_create(source=source)
+
+    def run(self, lines):
+        """
+        :param lines: iterable of the lines of the file, lines up to the checkpoint being skipped.
+        :return: Counter of imported projects, contributors, issues and comments.
+        """
+        batch = []
+        for number, line in enumerate(lines, start=1):
+            if number <= self.checkpoint.line or not line.strip():
+                continue
+            batch.append((number, line))
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.counts
+
+    def parse(self, batch):
+        """
+        :return: list of (line number, 'project' or 'issue', data) of well-formed lines.
+        """
+        records = []
+        for number, line in batch:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self.report(number, f'Invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict) or len(record) != 1 or not isinstance(next(iter(record.values())), dict):
+                self.report(number, 'Expected {"project": {...}} or {"issue": {...}}')
+                continue
+            kind, data = next(iter(record.items()))
+            if kind not in ('project', 'issue'):
+                self.report(number, f'Unknown record "{kind}"')
+                continue
+            records.append((number, kind, data))
+        return records
+
+    @staticmethod
+    def emails_of(kind, data):
+        emails = [data.get('author'), data.get('assignee')]
+        if kind == 'project':
+            emails += [contributor.get('email') for contributor in data.get('contributors', [])]
+        else:
+            emails += [comment.get('author') for comment in data.get('comments', [])]
+        return [CustomUser.objects.normalize_email(email) for email in emails if isinstance(email, str) and email]
+
+    def user_pk(self, email):
+        """
+        :raise ValidationError: if no user has this email.
+        """
+        pk = self.users.get(CustomUser.objects.normalize_email(email or ''))
+        if pk is None:
+            raise ValidationError({'email': [f'Unknown user {email}.']})
+        return pk
+
+    def import_batch(self, batch):
+        records = self.parse(batch)
+        with transaction.atomic():
+            if self.create_users:
+                emails = {email for number, kind, data in records for email in self.emails_of(kind, data)}
+                new_users = CustomUser.objects.bulk_create(
+                    CustomUser(email=email, password=make_password(None)) for email in emails - self.users.keys()
+                )
+                self.users.update((user.email, user.pk) for user in new_users)
+                self.counts['users'] += len(new_users)
+            if connection.vendor == 'sqlite':
+                with suspended_triggers():
+                    inserted = self.insert(records)
+                self.replay_triggers(*inserted)
+            else:
+                self.insert(records)
+            self.checkpoint.line = batch[-1][0]
+            self.checkpoint.save()
+
+    def insert(self, records):
+        """
+        Validates records and inserts valid ones, projects first so that issues get their primary key.
+        :return: inserted contributors, issues and comments.
+        """
+        project_titles = {data.get('title') for number, kind, data in records if kind == 'project'}
+        taken_project_titles = set(Project.objects.filter(title__in=project_titles).values_list('title', flat=True))
+        # Only the project of the checkpoint may already have issues:
+        issue_titles = {data.get('title') for number, kind, data in records if kind == 'issue'}
+        taken_issue_titles = {
+            (self.checkpoint.project_pk, title) for title in Issue.objects.filter(
+                project_id=self.checkpoint.project_pk, title__in=issue_titles
+            ).values_list('title', flat=True)
+        } if self.checkpoint.project_pk else set()
+
+        projects, contributors, issues, comments = [], [], [], []
+        # Project of the following issues: a pk, a Project to insert, or None if it was skipped.
+        project = self.checkpoint.project_pk
+        for number, kind, data in records:
+            try:
+                if kind == 'project':
+                    project = None
+                    project, project_contributors = self.build_project(data, taken_project_titles)
+                    projects.append(project)
+                    contributors += project_contributors
+                elif project is None:
+                    raise ValidationError({'project': ['The project of the issue was not imported.']})
+                else:
+                    issue, issue_comments = self.build_issue(data, project, taken_issue_titles, number)
+                    issues.append(issue)
+                    comments += issue_comments
+            except ValidationError as e:
+                self.report(number, first_error(e))
+
+        Project.objects.bulk_create(projects)
+        self.checkpoint.project_pk = project.pk if isinstance(project, Project) else project
+        contributors = Contributor.objects.bulk_create(contributors)
+        invalidate_memberships(contributor.user_id_id for contributor in contributors)
+        issues = Issue.objects.bulk_create(issues)
+        comments = Comment.objects.bulk_create(comments)
+        self.counts.update(projects=len(projects), contributors=len(contributors), issues=len(issues),
+                           comments=len(comments))
+        return contributors, issues, comments
+
+    def build_project(self, data, taken_titles):
+        author_pk = self.user_pk(data.get('author'))
+        project = Project(
+            title=data.get('title', ''), description=data.get('description', ''), type=data.get('type', ''),
+            author_user_id_id=author_pk
+        )
+        project.clean_fields(exclude=['author_user_id'])
+        if project.title in taken_titles:
+            raise ValidationError({'title': ['A project with this title already exists.']})
+        taken_titles.add(project.title)
+
+        contributors = [Contributor(user_id_id=author_pk, project_id=project, permission=Contributor.AUTHOR)]
+        members = {author_pk}
+        for item in data.get('contributors', []):
+            user_pk = self.user_pk(item.get('email'))
+            if user_pk in members:
+                continue
+            members.add(user_pk)
+            contributor = Contributor(
+                user_id_id=user_pk, project_id=project, permission=Contributor.CONTRIBUTOR, role=item.get('role', '')
+            )
+            contributor.clean_fields(exclude=['user_id', 'project_id'])
+            contributors.append(contributor)
+        return project, contributors
+
+    def build_issue(self, data, project, taken_titles, number):
+        """
+        :param project: pk of an existing project or Project to insert.
+        :return: the issue and its valid comments, invalid comments being reported.
+        """
+        author_pk = self.user_pk(data.get('author'))
+        issue = Issue(
+            title=data.get('title', ''), description=data.get('description', ''), tag=data.get('tag', ''),
+            priority=data.get('priority', ''), status=data.get('status', ''), author_user_id_id=author_pk,
+            assignee_user_id_id=self.user_pk(data['assignee']) if data.get('assignee') else author_pk
+        )
+        if isinstance(project, Project):
+            issue.project_id = project
+        else:
+            issue.project_id_id = project
+        issue.clean_fields(exclude=['project_id', 'author_user_id', 'assignee_user_id'])
+        key = (project if isinstance(project, int) else id(project), issue.title)
+        if key in taken_titles:
+            raise ValidationError({'title': ['An issue with this title already exists for this project.']})
+        taken_titles.add(key)
+
+        comments = []
+        descriptions = set()
+        for index, item in enumerate(data.get('comments', [])):
+            try:
+                comment = Comment(
+                    description=item.get('description', ''), author_user_id_id=self.user_pk(item.get('author')),
+                    issue_id=issue
+                )
+                comment.clean_fields(exclude=['author_user_id', 'issue_id'])
+                if comment.description in descriptions:
+                    raise ValidationError({'description': ['Comment repeated on this issue.']})
+                descriptions.add(comment.description)
+                comments.append(comment)
+            except ValidationError as e:
+                self.report(number, f'comment {index}: {first_error(e)}')
+        return issue, comments
+
+    @staticmethod
+    def replay_triggers(contributors, issues, comments):
+        """
+        Does the work of SUSPENDED_TRIGGERS for the inserted rows, primary keys of rows inserted
+        in a transaction being consecutive as SQLite has a single writer.
+        """
+        issue_pks = (issues[0].pk, issues[-1].pk) if issues else None
+        comment_pks = (comments[0].pk, comments[-1].pk) if comments else None
+        index_rows(issue_pks, comment_pks)
+        log_inserted(issue_pks, comment_pks)
+        if issue_pks:
+            count_inserted(issue_pks)
+        keys = {f'issues:{issue.project_id_id}' for issue in issues}
+        keys.update(f'comments:{comment.issue_id_id}' for comment in comments)
+        for contributor in contributors:
+            keys.update([f'project:{contributor.project_id_id}', f'projects:{contributor.user_id_id}'])
+        bump_versions(keys)
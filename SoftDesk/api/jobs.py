@@ -0,0 +1,118 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+"""
+Database-backed job queue for operations too long to run in a request.
+- Tasks are functions registered by name with the task decorator (see tasks.py), called with the job payload
+as keyword arguments, their return value being stored as the job result.
+- Jobs are claimed with a conditional UPDATE, so that several worker processes can share the queue
+without locks other than SQLite's own, and are leased for JOB_LEASE seconds.
+- Failed jobs are retried with an exponential backoff, up to their max_attempts.
+See the run_jobs management command for the worker.
+"""
+
+logger = logging.getLogger('api.jobs')
+
+TASKS = {}
+
+
+def task(name: str):
+    """
+    Decorator registering a function as the task of the given name.
+    """
+    def register(function):
+        TASKS[name] = function
+        return function
+    return register
+
+
+def enqueue(name: str, user=None, **payload) -> Job:
+    """
+    :param user: user allowed to consult the job, if any.
+    :return: the pending job running task name with payload.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown task {name}')
+    return Job.objects.create(task=name, payload=payload, user_id=user, max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+
+def backoff(attempts: int) -> timedelta:
+    """
+    :return: delay before the next attempt of a job which failed attempts times.
+    """
+    return timedelta(seconds=min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_BACKOFF))
+
+
+def claim():
+    """
+    Claims the oldest pending job due to run, or a running job whose lease is over.
+    Running jobs whose lease is over after their last attempt, their worker having crashed every time, are failed.
+    :return: the claimed job, or None if no job is due.
+    """
+    while True:
+        now = timezone.now()
+        abandoned = Job.objects.filter(status=Job.RUNNING, run_after__lte=now, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, error='Lease expired at the last attempt.', finished_time=now
+        )
+        if abandoned:
+            logger.error('%s jobs failed, their lease expired at the last attempt', abandoned)
+        due = Job.objects.filter(
+            status__in=[Job.PENDING, Job.RUNNING], run_after__lte=now, attempts__lt=F('max_attempts')
+        )
+        pk = due.order_by('run_after', 'id').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        # Only one worker's UPDATE matches the job, others try the next one:
+        claimed = due.filter(pk=pk).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, run_after=now + timedelta(seconds=settings.JOB_LEASE)
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def run(job: Job):
+    """
+    Runs the task of a claimed job, recording its result, or scheduling a retry if it fails.
+    """
+    try:
+        result = TASKS[job.task](**job.payload)
+    except Exception as e:
+        logger.exception('Job %s failed, attempt %s of %s', job, job.attempts, job.max_attempts)
+        job.error = repr(e)
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + backoff(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_time = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.error = ''
+        job.finished_time = timezone.now()
+    job.save(update_fields=['status', 'run_after', 'result', 'error', 'finished_time'])
+
+
+def work(once: bool = False, poll_interval: float = 1.0) -> int:
+    """
+    Runs due jobs one after the other, waiting poll_interval seconds when there is none.
+    :param once: if True, returns as soon as no job is due.
+    :return: number of jobs run.
+    """
+    count = 0
+    while True:
+        job = claim()
+        if job is None:
+            if once:
+                return count
+            time.sleep(poll_interval)
+            continue
+        run(job)
+        count += 1
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api import benchmark
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent.parent / 'benchmark_baseline.json'
+
+# Below this number of requests per endpoint, p95 latencies are noise:
+MIN_LATENCY_ITERATIONS = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every endpoint on synthetic datasets of increasing scale, in a temporary test database. "
+        "Fails if an endpoint runs more queries on a larger dataset, or on the largest dataset than in the stored "
+        "baseline, or has no baseline entry. Latencies are reported, and checked against the baseline "
+        "with --check-latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1, 5],
+                            help="Scales of the datasets, query counts being compared between consecutive scales")
+        parser.add_argument('--iterations', type=int, default=20, help="Requests per endpoint")
+        parser.add_argument('--users', type=int, default=10, help="Users at scale 1")
+        parser.add_argument('--projects', type=int, default=5, help="Projects at scale 1")
+        parser.add_argument('--contributors', type=int, default=3, help="Contributors per project at scale 1")
+        parser.add_argument('--issues', type=int, default=20, help="Issues per project at scale 1")
+        parser.add_argument('--comments', type=int, default=2, help="Comments per issue at scale 1")
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+        parser.add_argument('--check-latency', action='store_true',
+                            help=f"Fails if a p95 latency is over the baseline, "
+                                 f"with at least {MIN_LATENCY_ITERATIONS} iterations")
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help="Allowed p95 latency increase over the baseline, 0.5 meaning 50%%")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Stores the results of the largest scale as the new baseline")
+
+    def handle(self, *args, **options):
+        if options['check_latency'] and options['iterations'] < MIN_LATENCY_ITERATIONS:
+            raise CommandError(f"--check-latency needs at least {MIN_LATENCY_ITERATIONS} iterations.")
+        all_results = []
+        setup_test_environment()
+        old_database_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            # Datasets of all scales share the test database, each with its own prefix:
+            for scale in options['scales']:
+                dataset = benchmark.Dataset(
+                    scale, options['users'], options['projects'], options['contributors'],
+                    options['issues'], options['comments'], prefix=f'x{scale}',
+                ).seed()
+                all_results.append(benchmark.run(dataset, options['iterations']))
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'Endpoint':<26}" + ''.join(
+            f"{f'x{scale} queries':>12}{'p50 ms':>9}{'p95 ms':>9}" for scale in options['scales']
+        ))
+        for name in all_results[0]:
+            self.stdout.write(f'{name:<26}' + ''.join(
+                f"{results[name]['queries']:>12}{results[name]['p50']:>9}{results[name]['p95']:>9}"
+                for results in all_results
+            ))
+
+        failures = []
+        for small_results, large_results in zip(all_results, all_results[1:]):
+            for name in benchmark.growing_query_counts(small_results, large_results):
+                failures.append(f"{name}: query count grows with dataset size")
+        if options['update_baseline']:
+            benchmark.save_baseline(options['baseline'], all_results[-1])
+            self.stdout.write(f"Baseline stored in {options['baseline']}")
+        elif Path(options['baseline']).exists():
+            baseline = benchmark.load_baseline(options['baseline'])
+            for name in benchmark.missing_from_baseline(all_results[-1], baseline):
+                failures.append(f"{name}: no baseline entry, store one with --update-baseline")
+            for name in benchmark.over_baseline_queries(all_results[-1], baseline):
+                failures.append(
+                    f"{name}: {all_results[-1][name]['queries']} queries over baseline {baseline[name]['queries']}"
+                )
+            if options['check_latency']:
+                for name in benchmark.over_baseline(all_results[-1], baseline, options['tolerance']):
+                    failures.append(
+                        f"{name}: p95 {all_results[-1][name]['p95']} ms over baseline {baseline[name]['p95']} ms"
+                    )
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS("Benchmark passed."))
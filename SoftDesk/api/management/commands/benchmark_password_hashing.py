@@ -0,0 +1,77 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.models import CustomUser
+from api.serializers import VersionedTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a burst of logins alongside reads of another endpoint, with password hashing inline "
+        "and in the hashing pool, and prints the throughput of logins and the latencies of reads in each case."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help="Email of the user logging in and reading")
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--path', default='/projects/', help="Endpoint read during the burst of logins")
+        parser.add_argument('--logins', type=int, default=100)
+        parser.add_argument('--reads', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent logins, and concurrent reads")
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        authorization = f'Bearer {VersionedTokenObtainPairSerializer.get_token(user).access_token}'
+
+        self.stdout.write(
+            f"{options['logins']} logins and {options['reads']} reads of {options['path']}, "
+            f"{options['concurrency']} concurrent each"
+        )
+        self.stdout.write(f"{'Hashing':<16}{'logins/s':>10}{'503':>6}{'reads/s':>10}{'read p50':>10}{'read p95':>10}")
+        modes = [('inline', 0), (f'pool of {settings.PASSWORD_HASHING_WORKERS}', settings.PASSWORD_HASHING_WORKERS)]
+        for name, workers in modes:
+            # The test client uses the 'testserver' host:
+            with override_settings(ALLOWED_HOSTS=['testserver'], PASSWORD_HASHING_WORKERS=workers):
+                logins, reads = self.run_burst(options, authorization)
+            (login_elapsed, login_results), (read_elapsed, read_results) = logins, reads
+            latencies = sorted(latency for latency, code in read_results)
+            self.stdout.write(
+                f"{name:<16}{options['logins'] / login_elapsed:>10.1f}"
+                f"{sum(code == 503 for latency, code in login_results):>6}"
+                f"{options['reads'] / read_elapsed:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+                f"{latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000:>10.1f}"
+            )
+
+    @staticmethod
+    def run_burst(options, authorization):
+        credentials = {'email': options['email'], 'password': options['password']}
+
+        def login(_):
+            start = time.perf_counter()
+            response = Client().post('/login/', credentials)
+            return time.perf_counter() - start, response.status_code
+
+        def read(_):
+            start = time.perf_counter()
+            response = Client().get(options['path'], HTTP_AUTHORIZATION=authorization)
+            return time.perf_counter() - start, response.status_code
+
+        def timed(function, number):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                results = list(executor.map(function, range(number)))
+            return time.perf_counter() - start, results
+
+        with ThreadPoolExecutor(2) as executor:
+            logins = executor.submit(timed, login, options['logins'])
+            reads = executor.submit(timed, read, options['reads'])
+            return logins.result(), reads.result()
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.changes import compact
+from api.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = "Deletes change log entries older than the retention, clients syncing from before having to resync."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention', type=int, default=settings.CHANGE_LOG_RETENTION,
+            help="Age in seconds of the entries to delete (default: CHANGE_LOG_RETENTION)"
+        )
+        parser.add_argument(
+            '--background', action='store_true', help="Enqueue the compaction as a job for the run_jobs workers"
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue('compact_change_log', retention=options['retention'])
+            self.stdout.write(self.style.SUCCESS(f"Change log compaction enqueued as job {job.pk}."))
+            return
+        deleted = compact(options['retention'])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} change log entries deleted."))
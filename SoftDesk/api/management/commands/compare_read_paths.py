@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from api.models import CustomUser
+from api.serializers import VersionedTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a read endpoint through the WSGI handler, the ASGI handler with the synchronous DRF view, "
+        "and the ASGI handler with the async view, and prints throughput and latencies of each path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Synchronous route to test, e.g. /projects/1/issues/")
+        parser.add_argument('--email', required=True, help="Email of the user making the requests")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        token = VersionedTokenObtainPairSerializer.get_token(user).access_token
+        authorization = f'Bearer {token}'
+        path = options['path']
+        number, concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(f"{number} requests, {concurrency} concurrent, on {path}")
+        self.stdout.write(f"{'Path':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        # The test client uses the 'testserver' host:
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            results = [
+                ('WSGI, sync view', self.run_wsgi(path, authorization, number, concurrency)),
+                ('ASGI, sync view', asyncio.run(self.run_asgi(path, authorization, number, concurrency))),
+                ('ASGI, async view', asyncio.run(
+                    self.run_asgi(f'/async{path}', authorization, number, concurrency)
+                )),
+            ]
+        for name, (elapsed, latencies, errors) in results:
+            latencies.sort()
+            self.stdout.write(
+                f"{name:<24}{number / elapsed:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+                f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>10.1f}{errors:>8}"
+            )
+
+    @staticmethod
+    def run_wsgi(path, authorization, number, concurrency):
+        def get(_):
+            start = time.perf_counter()
+            response = Client().get(path, HTTP_AUTHORIZATION=authorization)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            responses = list(executor.map(get, range(number)))
+        elapsed = time.perf_counter() - start
+        return elapsed, [latency for latency, code in responses], sum(code != 200 for latency, code in responses)
+
+    @staticmethod
+    async def run_asgi(path, authorization, number, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def get():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, AUTHORIZATION=authorization)
+                return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(get() for _ in range(number)))
+        elapsed = time.perf_counter() - start
+        return elapsed, [latency for latency, code in responses], sum(code != 200 for latency, code in responses)
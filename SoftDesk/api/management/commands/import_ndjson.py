@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import Importer
+from api.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports projects, contributors, issues and comments from an NDJSON file (see api/importer.py for the format), "
+        "by batches of lines. An interrupted import resumes after its last committed batch when run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to import")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Lines per transaction")
+        parser.add_argument(
+            '--create-users', action='store_true', help="Create users for unknown emails instead of skipping lines"
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint of a previous import")
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f"No file {path}")
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=path).delete()
+
+        def report(number, message):
+            self.stderr.write(f"Line {number}: {message}")
+
+        importer = Importer(path, options['batch_size'], options['create_users'], report)
+        if importer.checkpoint.line:
+            self.stdout.write(f"Resuming after line {importer.checkpoint.line}.")
+        with open(path, encoding='utf-8') as file:
+            counts = importer.run(file)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['projects']} projects, {counts['contributors']} contributors, {counts['issues']} issues "
+            f"and {counts['comments']} comments, created {counts['users']} users."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import list_cache
+
+
+class Command(BaseCommand):
+    help = "Displays hit and miss counters of the issue and comment list cache."
+
+    def handle(self, *args, **options):
+        stats = list_cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / lookups if lookups else 0
+        self.stdout.write(f"Hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio:.1%}")
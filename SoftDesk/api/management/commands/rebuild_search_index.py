@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.jobs import enqueue
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of issues and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--background', action='store_true', help="Enqueue the rebuild as a job for the run_jobs workers"
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue('rebuild_search_index')
+            self.stdout.write(self.style.SUCCESS(f"Search index rebuild enqueued as job {job.pk}."))
+            return
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
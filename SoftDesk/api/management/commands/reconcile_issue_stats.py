@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.jobs import enqueue
+from api.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recomputes the issue stats of all projects from their issues, fixing counters which drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--background', action='store_true', help="Enqueue the reconciliation as a job for the run_jobs workers"
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            job = enqueue('reconcile_issue_stats')
+            self.stdout.write(self.style.SUCCESS(f"Issue stats reconciliation enqueued as job {job.pk}."))
+            return
+        drifts = reconcile()
+        for project_pk, field, value, stored, actual in drifts:
+            self.stdout.write(f"Project {project_pk} {field} {value}: {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drifts)} issue stats fixed."))
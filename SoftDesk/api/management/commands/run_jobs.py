@@ -0,0 +1,32 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the jobs of the background job queue with a pool of worker processes, "
+        "each claiming and running jobs one after the other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Number of worker processes")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls of an idle worker")
+        parser.add_argument('--once', action='store_true', help="Stop once no job is due instead of polling")
+
+    def handle(self, *args, **options):
+        processes, once, poll_interval = options['processes'], options['once'], options['poll_interval']
+        if processes <= 1:
+            count = jobs.work(once, poll_interval)
+        else:
+            # Connections can't be shared with forked processes, each worker opens its own:
+            connections.close_all()
+            with ProcessPoolExecutor(processes, initializer=django.setup) as executor:
+                workers = [executor.submit(jobs.work, once, poll_interval) for _ in range(processes)]
+                count = sum(worker.result() for worker in workers)
+        self.stdout.write(self.style.SUCCESS(f"{count} jobs run."))
@@ -0,0 +1,96 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.database import pragma_statements
+
+PROFILES = {
+    # SQLite and Django defaults: rollback journal, full sync, a new connection per request (CONN_MAX_AGE=0).
+    'default': {'pragmas': {}, 'persistent': False},
+    'tuned': {'pragmas': settings.SQLITE_PRAGMAS, 'persistent': True},
+}
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, isolation_level=None)
+    for statement in pragma_statements(pragmas):
+        connection.execute(statement)
+    return connection
+
+
+def run_worker(path, profile, requests, write_ratio, seed):
+    """
+    Runs requests mixing list reads of the issues of a project and issue inserts.
+    :return: (elapsed seconds, number of requests failing with "database is locked").
+    """
+    pragmas, persistent = PROFILES[profile]['pragmas'], PROFILES[profile]['persistent']
+    generator = random.Random(seed)
+    connection = connect(path, pragmas) if persistent else None
+    errors = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        if not persistent:
+            connection = connect(path, pragmas)
+        try:
+            if generator.random() < write_ratio:
+                connection.execute(
+                    'INSERT INTO issue (project_id, title, created_time) VALUES (?, ?, ?)',
+                    (generator.randrange(10), f'Issue {seed}-{i}', time.time())
+                )
+            else:
+                connection.execute(
+                    'SELECT id, title FROM issue WHERE project_id = ? ORDER BY created_time, id LIMIT 50',
+                    (generator.randrange(10),)
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+        if not persistent:
+            connection.close()
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return elapsed, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress-tests mixed reads and writes from several processes on a scratch SQLite database, "
+        "with SQLite defaults and with the SQLITE_PRAGMAS profile and persistent connections, "
+        "and prints throughput and lock errors of each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500, help="Requests per process")
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        processes, requests = options['processes'], options['requests']
+        self.stdout.write(
+            f"{processes} processes, {requests} requests each, {options['write_ratio']:.0%} writes"
+        )
+        self.stdout.write(f"{'Profile':<10}{'req/s':>10}{'errors':>8}")
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'stress.sqlite3')
+                connection = connect(path, PROFILES[profile]['pragmas'])
+                connection.execute(
+                    'CREATE TABLE issue (id INTEGER PRIMARY KEY, project_id INTEGER, title TEXT, created_time REAL)'
+                )
+                connection.execute('CREATE INDEX issue_project_page_idx ON issue (project_id, created_time, id)')
+                connection.close()
+                start = time.perf_counter()
+                with Pool(processes) as pool:
+                    results = pool.starmap(run_worker, [
+                        (path, profile, requests, options['write_ratio'], seed) for seed in range(processes)
+                    ])
+                elapsed = time.perf_counter() - start
+            errors = sum(worker_errors for worker_elapsed, worker_errors in results)
+            self.stdout.write(f"{profile:<10}{processes * requests / elapsed:>10.1f}{errors:>8}")
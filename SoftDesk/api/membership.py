@@ -0,0 +1,156 @@
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Project, Issue, Comment, Contributor
+
+"""
+Resolution of the authenticated user's membership and authorship.
+- The projects of a user, with permission and role, are kept in a shared cache as a per-user map,
+invalidated by Contributor signals and by the bulk writes which don't send them (see invalidate_memberships()).
+- Every permission class of a request asks the same request-scoped resolver, so that each question costs
+at most one cache lookup or query.
+"""
+
+Membership = namedtuple('Membership', ['project_pk', 'permission', 'role'])
+
+
+def membership_cache():
+    return caches[settings.MEMBERSHIP_CACHE_ALIAS]
+
+
+def version_key(user_pk) -> str:
+    return f'membership-version:{user_pk}'
+
+
+def membership_version(user_pk) -> str:
+    """
+    :return: current version stamp of the memberships of the user, a new random one if none is cached,
+    so that maps cached under a lost stamp are never read again.
+    """
+    cache = membership_cache()
+    version = cache.get(version_key(user_pk))
+    if version is None:
+        cache.add(version_key(user_pk), uuid.uuid4().hex, settings.MEMBERSHIP_CACHE_TIMEOUT)
+        version = cache.get(version_key(user_pk))
+    return version
+
+
+def get_memberships(user_pk) -> dict:
+    """
+    :return: {project pk: (permission, role)} of the projects of which the user is contributor,
+    from the cache or with one query.
+    - Maps are cached under the version stamp read before the query: a map read from the database before
+    a membership change is committed is stored under a stamp which the change replaces, and is never served.
+    - Memberships are read from the primary database, even in replica_reads(): a map read from a replica lagging
+    behind a committed change would be cached under the new stamp.
+    """
+    cache = membership_cache()
+    version = membership_version(user_pk)
+    key = f'membership:{user_pk}:{version}'
+    memberships = cache.get(key)
+    if memberships is None:
+        memberships = {
+            project_pk: (permission, role) for project_pk, permission, role in
+            Contributor.objects.using('default').filter(user_id=user_pk).values_list('project_id', 'permission', 'role')
+        }
+        cache.set(key, memberships, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return memberships
+
+
+def invalidate_memberships(user_pks):
+    """
+    Replaces the version stamps of the users, now and once the current transaction is committed,
+    so that no map read before the commit is served afterwards.
+    """
+    user_pks = set(user_pks)
+
+    def invalidate():
+        membership_cache().set_many(
+            {version_key(user_pk): uuid.uuid4().hex for user_pk in user_pks}, settings.MEMBERSHIP_CACHE_TIMEOUT
+        )
+    if user_pks:
+        invalidate()
+        transaction.on_commit(invalidate)
+
+
+class MembershipResolver:
+    """
+    Answers "is the user contributor/author of this project, issue or comment" questions.
+    - Project membership is read from the cached memberships of the user, without query. Whether a project
+    of which the user is not contributor exists is only asked to the database to adapt error messages.
+    - Answers are memoized, the resolver being attached to the request by for_request().
+    """
+    def __init__(self, user):
+        self.user = user
+        self._memberships = None
+        self._projects = {}
+        self._issue_authors = {}
+        self._comment_authors = {}
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Returns the resolver attached to the request, creating it on first call.
+        """
+        resolver = getattr(request, '_membership_resolver', None)
+        if resolver is None or resolver.user is not request.user:
+            resolver = cls(request.user)
+            request._membership_resolver = resolver
+        return resolver
+
+    def project(self, project_pk: int):
+        """
+        :param project_pk: pk of the project.
+        :return: a Membership, with permission and role set to None if the user is not contributor,
+        or None if the project does not exist.
+        """
+        if project_pk not in self._projects:
+            membership = self.memberships().get(project_pk)
+            if membership is not None:
+                self._projects[project_pk] = Membership(project_pk, *membership)
+            elif Project.objects.filter(pk=project_pk).exists():
+                self._projects[project_pk] = Membership(project_pk, None, None)
+            else:
+                self._projects[project_pk] = None
+        return self._projects[project_pk]
+
+    def memberships(self) -> dict:
+        if self._memberships is None:
+            self._memberships = get_memberships(self.user.pk)
+        return self._memberships
+
+    def project_pks(self) -> list:
+        """
+        :return: pks of the projects of which the user is contributor.
+        """
+        return list(self.memberships())
+
+    def is_project_contributor(self, project_pk: int) -> bool:
+        membership = self.project(project_pk)
+        return membership is not None and membership.permission is not None
+
+    def is_project_author(self, project_pk: int) -> bool:
+        membership = self.project(project_pk)
+        return membership is not None and membership.permission == Contributor.AUTHOR
+
+    def issue_author(self, issue_pk: int):
+        """
+        :return: pk of the author of the issue, or None if the issue does not exist.
+        """
+        if issue_pk not in self._issue_authors:
+            self._issue_authors[issue_pk] = Issue.objects.filter(
+                pk=issue_pk).values_list('author_user_id', flat=True).first()
+        return self._issue_authors[issue_pk]
+
+    def comment_author(self, comment_pk: int):
+        """
+        :return: pk of the author of the comment, or None if the comment does not exist.
+        """
+        if comment_pk not in self._comment_authors:
+            self._comment_authors[comment_pk] = Comment.objects.filter(
+                pk=comment_pk).values_list('author_user_id', flat=True).first()
+        return self._comment_authors[comment_pk]
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger('api.timing')
+
+
+class RequestTiming:
+    """
+    Durations recorded during a request, in milliseconds.
+    - Database queries are recorded by record_query().
+    - Authentication, permission checks and serialization are recorded by TimingMixin (see mixins.py).
+    """
+    def __init__(self):
+        self.queries = 0
+        self.durations = {'db': 0.0, 'auth': 0.0, 'perm': 0.0, 'ser': 0.0}
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += (time.perf_counter() - start) * 1000
+
+    def record_query(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper, see https://docs.djangoproject.com/en/3.2/topics/db/instrumentation/
+        """
+        self.queries += 1
+        with self.measure('db'):
+            return execute(sql, params, many, context)
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f'{name};dur={duration:.2f}' for name, duration in self.durations.items()]
+        metrics[0] += f';desc="{self.queries} queries"'
+        return ', '.join(metrics + [f'total;dur={total:.2f}'])
+
+
+# Timing of the current request, if it is sampled. Context variables being copied to the threads of sync_to_async,
+# concurrent async requests each record their own queries:
+current_timing = ContextVar('current_timing', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper installed once on every connection, recording queries in the timing of the request.
+    """
+    timing = current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    return timing.record_query(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Wrappers are kept by the connection object, across reconnections:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def sampled() -> bool:
+    return random.random() < getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0)
+
+
+def finish(request, response, start: float):
+    timing = request.timing
+    total = (time.perf_counter() - start) * 1000
+    response['Server-Timing'] = timing.server_timing(total)
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'queries': timing.queries,
+        **{f'{name}_ms': round(duration, 2) for name, duration in timing.durations.items()},
+        'total_ms': round(total, 2),
+    }))
+    return response
+
+
+@sync_and_async_middleware
+def request_timing_middleware(get_response):
+    """
+    Records query count, database time, authentication, permission and serialization times of a sample
+    of requests, in a Server-Timing response header and a JSON log line on the 'api.timing' logger.
+    The sampled fraction of requests is the REQUEST_TIMING_SAMPLE_RATE setting, between 0 and 1.
+    - Sync and async capable, so that Django doesn't run async views (see async_views.py) in a thread
+    to pass them through this middleware.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not sampled():
+                return await get_response(request)
+            request.timing = RequestTiming()
+            start = time.perf_counter()
+            token = current_timing.set(request.timing)
+            try:
+                response = await get_response(request)
+            finally:
+                current_timing.reset(token)
+            return finish(request, response, start)
+    else:
+        def middleware(request):
+            if not sampled():
+                return get_response(request)
+            request.timing = RequestTiming()
+            start = time.perf_counter()
+            token = current_timing.set(request.timing)
+            try:
+                response = get_response(request)
+            finally:
+                current_timing.reset(token)
+            return finish(request, response, start)
+    return middleware
@@ -0,0 +1,99 @@
+# Generated by Django 4.0 on 2026-10-18 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('email', models.EmailField(error_messages={'unique': 'A user with this email already exists.'}, max_length=255, unique=True, verbose_name='email address')),
+                ('first_name', models.CharField(blank=True, max_length=50)),
+                ('last_name', models.CharField(blank=True, max_length=50)),
+                ('is_active', models.BooleanField(default=True)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.Group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.Permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'User',
+                'verbose_name_plural': 'Users',
+            },
+        ),
+        migrations.CreateModel(
+            name='Contributor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('permission', models.CharField(choices=[('AU', 'Author'), ('CO', 'Contributor')], max_length=2)),
+                ('role', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=120, unique=True)),
+                ('description', models.CharField(max_length=300)),
+                ('type', models.CharField(choices=[('BE', 'back-end'), ('FE', 'front-end'), ('IO', 'IOS'), ('AN', 'Android')], error_messages={'invalid_choice': 'Type must be between those choices: BE for Back-end; FE for front-end; IO for IOS; AN for Android'}, max_length=2)),
+                ('contributors', models.ManyToManyField(through='api.Contributor', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Issue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=120)),
+                ('description', models.CharField(blank=True, max_length=300)),
+                ('tag', models.CharField(choices=[('BU', 'BUG'), ('AM', 'AMÉLIORATION'), ('TA', 'TÂCHE')], max_length=2)),
+                ('priority', models.CharField(choices=[('FA', 'FAIBLE'), ('MO', 'MOYENNE'), ('EL', 'ÉLEVÉE')], max_length=2)),
+                ('status', models.CharField(choices=[('AF', 'À faire'), ('EC', 'En cours'), ('TE', 'Terminé')], max_length=2)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('assignee_user_id', models.ForeignKey(default=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_issues', to=settings.AUTH_USER_MODEL), null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_issues', to='api.customuser')),
+                ('author_user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_issues', to='api.customuser')),
+                ('project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='api.project')),
+            ],
+            options={
+                'unique_together': {('title', 'project_id')},
+            },
+        ),
+        migrations.AddField(
+            model_name='contributor',
+            name='project_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='users', to='api.project'),
+        ),
+        migrations.AddField(
+            model_name='contributor',
+            name='user_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projects', to='api.customuser'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='contributor',
+            unique_together={('user_id', 'project_id')},
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(max_length=300)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('author_user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='api.customuser')),
+                ('issue_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='api.issue')),
+            ],
+            options={
+                'unique_together': {('description', 'issue_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0 on 2026-10-18 05:58
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_project_author(apps, schema_editor):
+    """
+    Copies the user of each author Contributor row to its project, in a single UPDATE.
+    """
+    Project = apps.get_model('api', 'Project')
+    Contributor = apps.get_model('api', 'Contributor')
+    authors = Contributor.objects.filter(project_id=OuterRef('pk'), permission='AU').values('user_id')[:1]
+    Project.objects.update(author_user_id=Subquery(authors))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='author_user_id',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='authored_projects', to='api.customuser'),
+        ),
+        migrations.RunPython(backfill_project_author, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0 on 2026-10-18 06:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_project_author_user_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contributor',
+            name='created_time',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='created_time',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['issue_id', 'created_time', 'id'], name='comment_issue_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contributor',
+            index=models.Index(fields=['project_id', 'created_time', 'id'], name='contributor_project_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'created_time', 'id'], name='issue_project_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_time', 'id'], name='project_page_idx'),
+        ),
+    ]
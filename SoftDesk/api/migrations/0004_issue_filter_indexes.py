@@ -0,0 +1,29 @@
+# Generated by Django 4.0 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_created_time_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'status', 'created_time', 'id'], name='issue_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(
+                fields=['project_id', 'priority', 'created_time', 'id'], name='issue_project_priority_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(
+                fields=['project_id', 'assignee_user_id', 'created_time', 'id'], name='issue_project_assignee_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_issue_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'tag', 'created_time', 'id'], name='issue_project_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(
+                fields=['project_id', 'author_user_id', 'created_time', 'id'], name='issue_project_author_idx'
+            ),
+        ),
+    ]
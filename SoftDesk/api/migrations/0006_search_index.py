@@ -0,0 +1,92 @@
+# Generated by Django 4.0 on 2026-10-18 06:40
+
+from django.db import migrations
+
+"""
+Full-text search index over issues and comments, as an SQLite FTS5 virtual table kept in sync by triggers.
+Issues are stored at rowid = 2 * id and comments at rowid = 2 * id + 1,
+so that triggers update and delete index rows by rowid.
+"""
+
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE api_search_index USING fts5(
+        title, body, kind UNINDEXED, project_id UNINDEXED, issue_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER api_issue_search_insert AFTER INSERT ON api_issue BEGIN
+        INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+        VALUES (new.id * 2, new.title, new.description, 'issue', new.project_id_id, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER api_issue_search_update AFTER UPDATE OF title, description ON api_issue BEGIN
+        UPDATE api_search_index SET title = new.title, body = new.description WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER api_issue_search_delete AFTER DELETE ON api_issue BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER api_comment_search_insert AFTER INSERT ON api_comment BEGIN
+        INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+        VALUES (
+            new.id * 2 + 1, '', new.description, 'comment',
+            (SELECT project_id_id FROM api_issue WHERE id = new.issue_id_id), new.issue_id_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER api_comment_search_update AFTER UPDATE OF description ON api_comment BEGIN
+        UPDATE api_search_index SET body = new.description WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER api_comment_search_delete AFTER DELETE ON api_comment BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT id * 2, title, description, 'issue', project_id_id, id FROM api_issue
+    """,
+    """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT api_comment.id * 2 + 1, '', api_comment.description, 'comment', api_issue.project_id_id, api_issue.id
+    FROM api_comment INNER JOIN api_issue ON api_issue.id = api_comment.issue_id_id
+    """,
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS api_issue_search_insert',
+    'DROP TRIGGER IF EXISTS api_issue_search_update',
+    'DROP TRIGGER IF EXISTS api_issue_search_delete',
+    'DROP TRIGGER IF EXISTS api_comment_search_insert',
+    'DROP TRIGGER IF EXISTS api_comment_search_update',
+    'DROP TRIGGER IF EXISTS api_comment_search_delete',
+    'DROP TABLE IF EXISTS api_search_index',
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_issue_tag_author_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SEARCH_INDEX), run_on_sqlite(DROP_SEARCH_INDEX)),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.0 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+"""
+Triggers bumping CollectionVersion rows on every write of projects, contributors, issues and comments.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+UPSERT = "ON CONFLICT(key) DO UPDATE SET version = version + 1, modified_time = excluded.modified_time"
+
+
+def bump(key):
+    return f"INSERT INTO api_collectionversion(key, version, modified_time) VALUES ({key}, 1, {NOW}) {UPSERT};"
+
+
+def bump_members(project_pk):
+    return (
+        f"INSERT INTO api_collectionversion(key, version, modified_time) "
+        f"SELECT 'projects:' || user_id_id, 1, {NOW} FROM api_contributor WHERE project_id_id = {project_pk} {UPSERT};"
+    )
+
+
+TRIGGERS = {
+    'api_issue_version_insert': ('AFTER INSERT ON api_issue', bump("'issues:' || new.project_id_id")),
+    'api_issue_version_update': ('AFTER UPDATE ON api_issue', bump("'issues:' || new.project_id_id")),
+    'api_issue_version_delete': ('AFTER DELETE ON api_issue', bump("'issues:' || old.project_id_id")),
+    'api_comment_version_insert': ('AFTER INSERT ON api_comment', bump("'comments:' || new.issue_id_id")),
+    'api_comment_version_update': ('AFTER UPDATE ON api_comment', bump("'comments:' || new.issue_id_id")),
+    'api_comment_version_delete': ('AFTER DELETE ON api_comment', bump("'comments:' || old.issue_id_id")),
+    'api_contributor_version_insert': (
+        'AFTER INSERT ON api_contributor',
+        bump("'project:' || new.project_id_id") + bump_members('new.project_id_id'),
+    ),
+    'api_contributor_version_update': (
+        'AFTER UPDATE ON api_contributor',
+        bump("'project:' || new.project_id_id") + bump_members('new.project_id_id')
+        + bump("'projects:' || old.user_id_id"),
+    ),
+    'api_contributor_version_delete': (
+        'AFTER DELETE ON api_contributor',
+        bump("'project:' || old.project_id_id") + bump_members('old.project_id_id')
+        + bump("'projects:' || old.user_id_id"),
+    ),
+    'api_project_version_update': (
+        'AFTER UPDATE ON api_project', bump("'project:' || new.id") + bump_members('new.id'),
+    ),
+    'api_project_version_delete': ('AFTER DELETE ON api_project', bump("'project:' || old.id")),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, (event, body) in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modified_time', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.0 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('line', models.PositiveBigIntegerField(default=0)),
+                ('project_pk', models.PositiveBigIntegerField(null=True)),
+                ('modified_time', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.0 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+"""
+Triggers appending a Change row on every write of projects, contributors, issues and comments.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def log(project_pk, model, object_pk, action):
+    return (
+        f"INSERT INTO api_change(project_pk, model, object_pk, action, created_time) "
+        f"VALUES ({project_pk}, '{model}', {object_pk}, '{action}', {NOW});"
+    )
+
+
+def issue_project(row):
+    # Comments are deleted before their issue, by Django cascades as by account deletion:
+    return f"(SELECT project_id_id FROM api_issue WHERE id = {row}.issue_id_id)"
+
+
+TRIGGERS = {
+    'api_project_change_insert': ('AFTER INSERT ON api_project', log('new.id', 'project', 'new.id', 'create')),
+    'api_project_change_update': ('AFTER UPDATE ON api_project', log('new.id', 'project', 'new.id', 'update')),
+    'api_project_change_delete': ('AFTER DELETE ON api_project', log('old.id', 'project', 'old.id', 'delete')),
+    'api_contributor_change_insert': (
+        'AFTER INSERT ON api_contributor', log('new.project_id_id', 'contributor', 'new.id', 'create'),
+    ),
+    'api_contributor_change_update': (
+        'AFTER UPDATE ON api_contributor', log('new.project_id_id', 'contributor', 'new.id', 'update'),
+    ),
+    'api_contributor_change_delete': (
+        'AFTER DELETE ON api_contributor', log('old.project_id_id', 'contributor', 'old.id', 'delete'),
+    ),
+    'api_issue_change_insert': ('AFTER INSERT ON api_issue', log('new.project_id_id', 'issue', 'new.id', 'create')),
+    'api_issue_change_update': ('AFTER UPDATE ON api_issue', log('new.project_id_id', 'issue', 'new.id', 'update')),
+    'api_issue_change_delete': ('AFTER DELETE ON api_issue', log('old.project_id_id', 'issue', 'old.id', 'delete')),
+    'api_comment_change_insert': (
+        'AFTER INSERT ON api_comment', log(issue_project('new'), 'comment', 'new.id', 'create'),
+    ),
+    'api_comment_change_update': (
+        'AFTER UPDATE ON api_comment', log(issue_project('new'), 'comment', 'new.id', 'update'),
+    ),
+    'api_comment_change_delete': (
+        'AFTER DELETE ON api_comment', log(issue_project('old'), 'comment', 'old.id', 'delete'),
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, (event, body) in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_pk', models.PositiveBigIntegerField(null=True)),
+                ('model', models.CharField(choices=[('project', 'Project'), ('contributor', 'Contributor'), ('issue', 'Issue'), ('comment', 'Comment')], max_length=11)),
+                ('object_pk', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=6)),
+                ('created_time', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['project_pk', 'id'], name='change_project_idx'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.0 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+"""
+Triggers counting the issues of projects by status, priority and tag in IssueStat rows,
+which are filled with the counts of existing issues.
+"""
+
+FIELDS = ['status', 'priority', 'tag']
+
+
+def increment(field, row):
+    return (
+        f"INSERT INTO api_issuestat(project_pk, field, value, count) "
+        f"VALUES ({row}.project_id_id, '{field}', {row}.{field}, 1) "
+        f"ON CONFLICT(project_pk, field, value) DO UPDATE SET count = count + 1;"
+    )
+
+
+def decrement(field, row):
+    return (
+        f"UPDATE api_issuestat SET count = count - 1 "
+        f"WHERE project_pk = {row}.project_id_id AND field = '{field}' AND value = {row}.{field};"
+    )
+
+
+TRIGGERS = {
+    'api_issue_stats_insert': (
+        'AFTER INSERT ON api_issue', ''.join(increment(field, 'new') for field in FIELDS),
+    ),
+    'api_issue_stats_delete': (
+        'AFTER DELETE ON api_issue', ''.join(decrement(field, 'old') for field in FIELDS),
+    ),
+    **{
+        f'api_issue_stats_update_{field}': (
+            f'AFTER UPDATE OF {field}, project_id_id ON api_issue '
+            f'WHEN old.{field} IS NOT new.{field} OR old.project_id_id IS NOT new.project_id_id',
+            decrement(field, 'old') + increment(field, 'new'),
+        )
+        for field in FIELDS
+    },
+    'api_project_stats_delete': (
+        'AFTER DELETE ON api_project', "DELETE FROM api_issuestat WHERE project_pk = old.id;",
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Counts of existing issues:
+    for field in FIELDS:
+        schema_editor.execute(
+            f"INSERT INTO api_issuestat(project_pk, field, value, count) "
+            f"SELECT project_id_id, '{field}', {field}, count(*) FROM api_issue GROUP BY project_id_id, {field}"
+        )
+    for name, (event, body) in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_pk', models.PositiveBigIntegerField()),
+                ('field', models.CharField(max_length=8)),
+                ('value', models.CharField(max_length=2)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='issuestat',
+            constraint=models.UniqueConstraint(fields=('project_pk', 'field', 'value'), name='issue_stat_unique'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.0 on 2026-10-18 08:10
+
+from django.db import migrations
+
+"""
+Update trigger of issues in the search index also following moves of issues to other projects,
+the project of the issue and of its comments being rewritten, so that the index is never searched
+with the project an issue left.
+"""
+
+CREATE_UPDATE_TRIGGER = [
+    'DROP TRIGGER IF EXISTS api_issue_search_update',
+    """
+    CREATE TRIGGER api_issue_search_update AFTER UPDATE OF title, description, project_id_id ON api_issue BEGIN
+        UPDATE api_search_index SET title = new.title, body = new.description, project_id = new.project_id_id
+        WHERE rowid = new.id * 2;
+        UPDATE api_search_index SET project_id = new.project_id_id
+        WHERE old.project_id_id IS NOT new.project_id_id
+        AND rowid IN (SELECT id * 2 + 1 FROM api_comment WHERE issue_id_id = new.id);
+    END
+    """,
+    # Rows of issues moved before this migration:
+    """
+    UPDATE api_search_index SET project_id = (SELECT project_id_id FROM api_issue WHERE id = api_search_index.issue_id)
+    WHERE project_id IS NOT (SELECT project_id_id FROM api_issue WHERE id = api_search_index.issue_id)
+    """,
+]
+
+DROP_UPDATE_TRIGGER = [
+    'DROP TRIGGER IF EXISTS api_issue_search_update',
+    """
+    CREATE TRIGGER api_issue_search_update AFTER UPDATE OF title, description ON api_issue BEGIN
+        UPDATE api_search_index SET title = new.title, body = new.description WHERE rowid = new.id * 2;
+    END
+    """,
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_issuestat'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_UPDATE_TRIGGER), run_on_sqlite(DROP_UPDATE_TRIGGER)),
+    ]
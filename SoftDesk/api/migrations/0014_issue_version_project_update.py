@@ -0,0 +1,40 @@
+# Generated by Django 4.0 on 2026-10-18 08:20
+
+from django.db import migrations
+
+"""
+Update trigger of issues bumping the issues version of the project an issue left, as well as of its new project,
+so that the ETags and cached lists of the old project don't keep serving moved issues.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+UPSERT = "ON CONFLICT(key) DO UPDATE SET version = version + 1, modified_time = excluded.modified_time"
+
+BUMP_NEW = (
+    f"INSERT INTO api_collectionversion(key, version, modified_time) "
+    f"VALUES ('issues:' || new.project_id_id, 1, {NOW}) {UPSERT};"
+)
+BUMP_OLD = (
+    f"INSERT INTO api_collectionversion(key, version, modified_time) "
+    f"SELECT 'issues:' || old.project_id_id, 1, {NOW} WHERE old.project_id_id IS NOT new.project_id_id {UPSERT};"
+)
+
+
+def create_trigger(body):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        schema_editor.execute('DROP TRIGGER IF EXISTS api_issue_version_update')
+        schema_editor.execute(f"CREATE TRIGGER api_issue_version_update AFTER UPDATE ON api_issue BEGIN {body} END")
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_search_index_project_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger(BUMP_NEW + BUMP_OLD), create_trigger(BUMP_NEW)),
+    ]
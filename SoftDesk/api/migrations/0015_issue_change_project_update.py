@@ -0,0 +1,65 @@
+# Generated by Django 4.0 on 2026-10-18 08:30
+
+from django.db import migrations
+
+"""
+Change log entries of issues moved to another project: the project the issue left gets tombstones of the issue
+and of its comments, and the new project gets their creation, so that clients syncing either project follow the move.
+Other updates of issues are logged as before.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def log(project_pk, model, object_pk, action):
+    return (
+        f"INSERT INTO api_change(project_pk, model, object_pk, action, created_time) "
+        f"VALUES ({project_pk}, '{model}', {object_pk}, '{action}', {NOW});"
+    )
+
+
+def log_comments(project_pk, action):
+    return (
+        f"INSERT INTO api_change(project_pk, model, object_pk, action, created_time) "
+        f"SELECT {project_pk}, 'comment', id, '{action}', {NOW} FROM api_comment WHERE issue_id_id = new.id ORDER BY id;"
+    )
+
+
+MOVED = 'old.project_id_id IS NOT new.project_id_id'
+
+TRIGGERS = {
+    'api_issue_change_update': (
+        f'AFTER UPDATE ON api_issue WHEN NOT ({MOVED})', log('new.project_id_id', 'issue', 'new.id', 'update'),
+    ),
+    'api_issue_change_move': (
+        f'AFTER UPDATE ON api_issue WHEN {MOVED}',
+        log_comments('old.project_id_id', 'delete') + log('old.project_id_id', 'issue', 'old.id', 'delete')
+        + log('new.project_id_id', 'issue', 'new.id', 'create') + log_comments('new.project_id_id', 'create'),
+    ),
+}
+
+PREVIOUS_TRIGGERS = {
+    'api_issue_change_update': ('AFTER UPDATE ON api_issue', log('new.project_id_id', 'issue', 'new.id', 'update')),
+}
+
+
+def replace_triggers(triggers):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for name in TRIGGERS:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name, (event, body) in triggers.items():
+            schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_issue_version_project_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_triggers(TRIGGERS), replace_triggers(PREVIOUS_TRIGGERS)),
+    ]
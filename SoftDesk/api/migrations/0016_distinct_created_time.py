@@ -0,0 +1,42 @@
+# Generated by Django 4.0 on 2026-10-18 08:40
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count
+
+"""
+Distinct created_time of the projects and contributors which existed before migration 0003,
+all of which got the time of the migration.
+CursorPagination breaks ties of the first ordering field with an offset, capped at 1000 rows, so that pages
+of more than 1000 rows sharing created_time repeat or skip rows. Rows sharing a created_time are spread
+over the microseconds before it, in id order.
+"""
+
+BATCH_SIZE = 1000
+
+
+def spread_created_time(apps, schema_editor):
+    for model_name in ('Project', 'Contributor'):
+        model = apps.get_model('api', model_name)
+        shared = model.objects.values('created_time').annotate(rows=Count('id')).filter(rows__gt=1)
+        for created_time, rows in shared.values_list('created_time', 'rows'):
+            batch = []
+            for i, instance in enumerate(model.objects.filter(created_time=created_time).order_by('id').only('id')):
+                instance.created_time = created_time - timedelta(microseconds=rows - 1 - i)
+                batch.append(instance)
+                if len(batch) == BATCH_SIZE:
+                    model.objects.bulk_update(batch, ['created_time'])
+                    batch = []
+            model.objects.bulk_update(batch, ['created_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_issue_change_project_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_created_time, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0 on 2026-10-18 09:00
+
+from django.db import migrations
+
+"""
+Update trigger of comments bumping the comments version of the issue a comment left, as well as of its new issue,
+so that the ETags and cached lists of the old issue don't keep serving moved comments.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+UPSERT = "ON CONFLICT(key) DO UPDATE SET version = version + 1, modified_time = excluded.modified_time"
+
+BUMP_NEW = (
+    f"INSERT INTO api_collectionversion(key, version, modified_time) "
+    f"VALUES ('comments:' || new.issue_id_id, 1, {NOW}) {UPSERT};"
+)
+BUMP_OLD = (
+    f"INSERT INTO api_collectionversion(key, version, modified_time) "
+    f"SELECT 'comments:' || old.issue_id_id, 1, {NOW} WHERE old.issue_id_id IS NOT new.issue_id_id {UPSERT};"
+)
+
+
+def create_trigger(body):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        schema_editor.execute('DROP TRIGGER IF EXISTS api_comment_version_update')
+        schema_editor.execute(f"CREATE TRIGGER api_comment_version_update AFTER UPDATE ON api_comment BEGIN {body} END")
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_distinct_created_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger(BUMP_NEW + BUMP_OLD), create_trigger(BUMP_NEW)),
+    ]
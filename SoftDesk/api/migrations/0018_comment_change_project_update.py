@@ -0,0 +1,64 @@
+# Generated by Django 4.0 on 2026-10-18 09:10
+
+from django.db import migrations
+
+"""
+Change log entries of comments moved to an issue of another project: the project the comment left gets
+its tombstone, and the new project gets its creation, as issues moved between projects (see 0015).
+Other updates of comments are logged as before.
+"""
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def log(project_pk, model, object_pk, action):
+    return (
+        f"INSERT INTO api_change(project_pk, model, object_pk, action, created_time) "
+        f"VALUES ({project_pk}, '{model}', {object_pk}, '{action}', {NOW});"
+    )
+
+
+def issue_project(row):
+    return f"(SELECT project_id_id FROM api_issue WHERE id = {row}.issue_id_id)"
+
+
+MOVED = f"{issue_project('old')} IS NOT {issue_project('new')}"
+
+TRIGGERS = {
+    'api_comment_change_update': (
+        f'AFTER UPDATE ON api_comment WHEN NOT ({MOVED})', log(issue_project('new'), 'comment', 'new.id', 'update'),
+    ),
+    'api_comment_change_move': (
+        f'AFTER UPDATE ON api_comment WHEN {MOVED}',
+        log(issue_project('old'), 'comment', 'old.id', 'delete')
+        + log(issue_project('new'), 'comment', 'new.id', 'create'),
+    ),
+}
+
+PREVIOUS_TRIGGERS = {
+    'api_comment_change_update': (
+        'AFTER UPDATE ON api_comment', log(issue_project('new'), 'comment', 'new.id', 'update'),
+    ),
+}
+
+
+def replace_triggers(triggers):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for name in TRIGGERS:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name, (event, body) in triggers.items():
+            schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_comment_version_issue_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_triggers(TRIGGERS), replace_triggers(PREVIOUS_TRIGGERS)),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.0 on 2026-10-18 09:20
+
+from django.db import migrations
+
+"""
+Update trigger of comments in the search index also following moves of comments to other issues,
+the issue and project of the comment being rewritten, as for issues moved to other projects (see 0013).
+"""
+
+CREATE_UPDATE_TRIGGER = [
+    'DROP TRIGGER IF EXISTS api_comment_search_update',
+    """
+    CREATE TRIGGER api_comment_search_update AFTER UPDATE OF description, issue_id_id ON api_comment BEGIN
+        UPDATE api_search_index SET
+            body = new.description, issue_id = new.issue_id_id,
+            project_id = (SELECT project_id_id FROM api_issue WHERE id = new.issue_id_id)
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    # Rows of comments moved before this migration:
+    """
+    UPDATE api_search_index SET
+        issue_id = (SELECT issue_id_id FROM api_comment WHERE id = api_search_index.rowid / 2),
+        project_id = (
+            SELECT api_issue.project_id_id FROM api_comment INNER JOIN api_issue ON api_issue.id = api_comment.issue_id_id
+            WHERE api_comment.id = api_search_index.rowid / 2
+        )
+    WHERE kind = 'comment'
+    AND issue_id IS NOT (SELECT issue_id_id FROM api_comment WHERE id = api_search_index.rowid / 2)
+    """,
+]
+
+DROP_UPDATE_TRIGGER = [
+    'DROP TRIGGER IF EXISTS api_comment_search_update',
+    """
+    CREATE TRIGGER api_comment_search_update AFTER UPDATE OF description ON api_comment BEGIN
+        UPDATE api_search_index SET body = new.description WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_comment_change_project_update'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_UPDATE_TRIGGER), run_on_sqlite(DROP_UPDATE_TRIGGER)),
+    ]
@@ -0,0 +1,191 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import permissions, status
+from rest_framework.response import Response
+
+from .cache import list_cache
+from .database import is_sticky, mark_sticky, replica_reads
+from .events import publish
+from .models import CollectionVersion, Change
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified headers to list and retrieve responses, and answers 304 Not Modified
+    to If-None-Match and If-Modified-Since requests, without running the view's queries nor serializing.
+    - Validators are derived from the CollectionVersion row of the key given by get_version_key(),
+    costing a single primary key lookup after permission checks.
+    - ETag also depends on the full path, as query parameters (cursor, filters) change the representation.
+    """
+    def get_version_key(self) -> str:
+        raise NotImplementedError('Views using ConditionalGetMixin must define get_version_key()')
+
+    def get_collection_version(self):
+        """
+        :return: (key, version, modified_time) of the collection, fetched once per request.
+        """
+        if not hasattr(self, '_collection_version'):
+            key = self.get_version_key()
+            self._collection_version = (key, *CollectionVersion.get(key))
+        return self._collection_version
+
+    def get_validators(self, request):
+        """
+        :return: (etag, last_modified timestamp or None) of the requested representation.
+        """
+        key, version, modified_time = self.get_collection_version()
+        digest = hashlib.sha1(f'{key}:{version}:{request.get_full_path()}'.encode()).hexdigest()
+        last_modified = int(modified_time.timestamp()) if modified_time else None
+        return quote_etag(digest), last_modified
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return bool(last_modified and if_modified_since and last_modified <= if_modified_since)
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class CachedListMixin:
+    """
+    Read-through cache of serialized list pages, to be used after ConditionalGetMixin.
+    Pages are keyed by the version of their collection, so that any write to the collection makes
+    its cached pages unreachable, stale entries being then evicted by the cache's LRU culling or timeout.
+    """
+    def list(self, request, *args, **kwargs):
+        key, version, modified_time = self.get_collection_version()
+        digest = hashlib.sha1(f'{key}:{version}:{request.build_absolute_uri()}'.encode()).hexdigest()
+        cache_key = f'list:{digest}'
+
+        data = list_cache.get(cache_key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            list_cache.set(cache_key, response.data)
+            response['X-Cache'] = 'MISS'
+        return response
+
+
+class TimingMixin:
+    """
+    Records authentication, permission checks and serialization times of DRF views in the RequestTiming
+    attached to the request by request_timing_middleware, doing nothing for requests which are not sampled.
+    Only serializers given by get_serializer() are timed.
+    """
+    def get_timing(self):
+        return getattr(self.request, 'timing', None)
+
+    def perform_authentication(self, request):
+        timing = self.get_timing()
+        if timing is None:
+            return super().perform_authentication(request)
+        with timing.measure('auth'):
+            return super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        timing = self.get_timing()
+        if timing is None:
+            return super().check_permissions(request)
+        with timing.measure('perm'):
+            return super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        timing = self.get_timing()
+        if timing is None:
+            return super().check_object_permissions(request, obj)
+        with timing.measure('perm'):
+            return super().check_object_permissions(request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = self.get_timing()
+        if timing is not None:
+            to_representation = serializer.to_representation
+
+            def timed_to_representation(instance):
+                with timing.measure('ser'):
+                    return to_representation(instance)
+            serializer.to_representation = timed_to_representation
+        return serializer
+
+
+class ReplicaReadMixin:
+    """
+    Runs list and retrieve actions, and permission checks of all actions, on the read replicas
+    (see database.ReplicaRouter), unless the user wrote in the last REPLICA_STICKINESS seconds.
+    Successful writes make the user sticky to the primary database.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def use_replica(self, request) -> bool:
+        if not hasattr(self, '_use_replica'):
+            user = request.user
+            self._use_replica = not (user and user.is_authenticated and is_sticky(user.pk))
+        return self._use_replica
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and self.use_replica(request):
+            self._replica_reads = replica_reads()
+            self._replica_reads.__enter__()
+
+    def check_permissions(self, request):
+        with replica_reads(self.use_replica(request)):
+            return super().check_permissions(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if hasattr(self, '_replica_reads'):
+            self._replica_reads.__exit__(None, None, None)
+            del self._replica_reads
+        if (
+            request.method not in permissions.SAFE_METHODS and response.status_code < 400
+            and request.user and request.user.is_authenticated
+        ):
+            mark_sticky(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class EventPublishingMixin:
+    """
+    Publishes the rows written by create, update and destroy actions to the event subscribers of the project
+    (see api/events.py), for views nested under a project.
+    """
+    event_type = None
+
+    def publish_events(self, object_pks, action):
+        publish(int(self.kwargs['project_pk']), self.event_type, object_pks, action)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.publish_events([serializer.instance.pk], Change.CREATE)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.publish_events([serializer.instance.pk], Change.UPDATE)
+
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        super().perform_destroy(instance)
+        self.publish_events([pk], Change.DELETE)
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 
 
 class CustomUserManager(BaseUserManager):
@@ -36,6 +37,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=50, blank=True)
     last_name = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
+    # Incremented to revoke all tokens issued to the user (see authentication.py):
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
@@ -72,9 +75,13 @@ class Contributor(models.Model):
     project_id = models.ForeignKey('api.Project', on_delete=models.CASCADE, related_name='users')
     permission = models.CharField(max_length=2, choices=PERMISSION_CHOICES)
     role = models.CharField(max_length=50)
+    created_time = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('user_id', 'project_id')
+        indexes = [
+            models.Index(fields=['project_id', 'created_time', 'id'], name='contributor_project_page_idx'),
+        ]
 
 
 class Project(models.Model):
@@ -101,13 +108,19 @@ class Project(models.Model):
         }
     )
     contributors = models.ManyToManyField(settings.AUTH_USER_MODEL, through='Contributor')
+    # Denormalized from the author Contributor row, kept in sync by signals (see signals.py).
+    author_user_id = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='authored_projects'
+    )
+    created_time = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.title
 
-    @property
-    def author_user_id(self):
-        return CustomUser.objects.get(projects__project_id=self, projects__permission=Contributor.AUTHOR).pk
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_time', 'id'], name='project_page_idx'),
+        ]
 
 
 class Issue(models.Model):
@@ -164,6 +177,18 @@ class Issue(models.Model):
 
     class Meta:
         unique_together = ('title', 'project_id')
+        indexes = [
+            models.Index(fields=['project_id', 'created_time', 'id'], name='issue_project_page_idx'),
+            models.Index(fields=['project_id', 'status', 'created_time', 'id'], name='issue_project_status_idx'),
+            models.Index(fields=['project_id', 'priority', 'created_time', 'id'], name='issue_project_priority_idx'),
+            models.Index(fields=['project_id', 'tag', 'created_time', 'id'], name='issue_project_tag_idx'),
+            models.Index(
+                fields=['project_id', 'author_user_id', 'created_time', 'id'], name='issue_project_author_idx'
+            ),
+            models.Index(
+                fields=['project_id', 'assignee_user_id', 'created_time', 'id'], name='issue_project_assignee_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -177,3 +202,147 @@ class Comment(models.Model):
 
     class Meta:
         unique_together = ('description', 'issue_id')
+        indexes = [
+            models.Index(fields=['issue_id', 'created_time', 'id'], name='comment_issue_page_idx'),
+        ]
+
+
+class CollectionVersion(models.Model):
+    """
+    Version counter of a collection of rows, used as a cheap validator for conditional requests.
+    Rows are written by SQLite triggers on every insert, update and delete of the rows of the collection
+    (see migration 0007_collectionversion), so that bulk and cascade writes are accounted for too.
+    Keys are:
+    - 'project:<project pk>': the project and its contributors.
+    - 'projects:<user pk>': the projects of which the user is contributor.
+    - 'issues:<project pk>': the issues of the project.
+    - 'comments:<issue pk>': the comments of the issue.
+    The 'changes:horizon' row isn't a collection: its version is the id of the last compacted Change (see changes.py).
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    modified_time = models.DateTimeField()
+
+    @classmethod
+    def get(cls, key: str):
+        """
+        :return: (version, modified_time) of the collection, (0, None) if it was never written.
+        """
+        row = cls.objects.filter(key=key).values_list('version', 'modified_time').first()
+        return row if row else (0, None)
+
+
+class IssueStat(models.Model):
+    """
+    Number of issues of a project having a value of status, priority or tag, read by the project stats endpoint.
+    Rows are written by SQLite triggers on every insert, update and delete of issues (see migration 0012_issuestat),
+    in the statement of the write, and checked against the issues by the reconcile_issue_stats management command.
+    - project_pk isn't a foreign key, so that stats don't get in the way of raw project deletions:
+    the rows of a project are deleted by a trigger along with it.
+    """
+    FIELDS = ['status', 'priority', 'tag']
+
+    project_pk = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=8)
+    value = models.CharField(max_length=2)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project_pk', 'field', 'value'], name='issue_stat_unique'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Background job of the database-backed queue, run by the run_jobs management command (see jobs.py).
+    - run_after is the time from which a pending job can be run, or the end of the lease of a running job,
+    after which the job is considered abandoned by its worker and run again.
+    - payload holds the keyword arguments of the task, result its return value, both as JSON.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    user_id = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='jobs'
+    )
+    created_time = models.DateTimeField(auto_now_add=True)
+    finished_time = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='job_claim_idx'),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of an import by the import_ndjson management command, saved in the transaction of each batch
+    so that an interrupted import resumes after the last committed line.
+    - project_pk is the project to which the issues following line belong. It isn't a foreign key,
+    so that checkpoints don't get in the way of project deletions.
+    """
+    source = models.CharField(max_length=255, primary_key=True)
+    line = models.PositiveBigIntegerField(default=0)
+    project_pk = models.PositiveBigIntegerField(null=True)
+    modified_time = models.DateTimeField(auto_now=True)
+
+
+class Change(models.Model):
+    """
+    Append-only log of the writes of projects, contributors, issues and comments, read by clients syncing a project
+    incrementally (see changes.py). Rows are written by SQLite triggers in the transaction of every insert, update
+    and delete (see migration 0011_change), so that bulk, raw and cascade writes are logged too.
+    - id is the cursor of the change, SQLite never reusing the ids of AUTOINCREMENT tables.
+    - project_pk and object_pk aren't foreign keys, the log outliving the rows it refers to.
+    - Rows older than CHANGE_LOG_RETENTION are deleted by the compact_change_log management command.
+    """
+    PROJECT = 'project'
+    CONTRIBUTOR = 'contributor'
+    ISSUE = 'issue'
+    COMMENT = 'comment'
+    MODEL_CHOICES = [
+        (PROJECT, 'Project'),
+        (CONTRIBUTOR, 'Contributor'),
+        (ISSUE, 'Issue'),
+        (COMMENT, 'Comment'),
+    ]
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    ]
+
+    project_pk = models.PositiveBigIntegerField(null=True)
+    model = models.CharField(max_length=11, choices=MODEL_CHOICES)
+    object_pk = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    created_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_pk', 'id'], name='change_project_idx'),
+        ]
@@ -1,54 +1,57 @@
 from rest_framework.permissions import BasePermission
 from django.core.exceptions import ObjectDoesNotExist
-from .models import Project, Issue, Comment, CustomUser
+from .models import CustomUser
+from .membership import MembershipResolver
+
+
+def get_project_pk(request) -> int:
+    """
+    Project pk is in 'project_pk' url kwarg for nested routes, and in 'pk' for project routes.
+    """
+    try:
+        return int(request.resolver_match.kwargs['project_pk'])
+    except KeyError:
+        return int(request.resolver_match.kwargs['pk'])
 
 
 class IsProjectContributor(BasePermission):
     """
-    - Checking if the user is contributor by checking if project pk in url
-    is in the set of the projects of which the authenticated user is contributor or author.
+    - Checking if the user is contributor by resolving the membership of the authenticated user
+    for the project pk in url (one query per request, shared with other permissions).
     - Message is changed if the project does not exist.
     """
     message = "Access forbidden: You are not contributor of the project"
 
     def has_permission(self, request, view):
-        try:
-            project_pk = int(request.resolver_match.kwargs['project_pk'])
-        except KeyError:
-            project_pk = int(request.resolver_match.kwargs['pk'])
+        project_pk = get_project_pk(request)
+        resolver = MembershipResolver.for_request(request)
 
         # Adapted message if project does not exist:
-        try:
-            Project.objects.get(pk=project_pk)
-        except ObjectDoesNotExist:
+        if resolver.project(project_pk) is None:
             self.message = "Project does not exist"
+            return False
 
-        projects_of_which_user_is_contributor = list(request.user.project_set.all().values_list('pk', flat=True))
-        return project_pk in projects_of_which_user_is_contributor
+        return resolver.is_project_contributor(project_pk)
 
 
 class IsProjectAuthor(BasePermission):
     """
-    - Checking if the user is the author of the project comparing the project's author_user_id and
-    the authenticated user's pk.
+    - Checking if the user is the author of the project by resolving the membership of the authenticated user
+    for the project pk in url.
     - Message is changed if the project does not exist at all.
     """
     message = "Access forbidden: You are not the author of the project"
 
     def has_permission(self, request, view):
-        try:
-            project_pk = int(request.resolver_match.kwargs['project_pk'])
-        except KeyError:
-            project_pk = int(request.resolver_match.kwargs['pk'])
+        project_pk = get_project_pk(request)
+        resolver = MembershipResolver.for_request(request)
 
         # Adapted message if project does not exist at all:
-        try:
-            project = Project.objects.get(pk=project_pk)
-        except ObjectDoesNotExist:
+        if resolver.project(project_pk) is None:
             self.message = "Project does not exist"
             return False
 
-        return project.author_user_id == request.user.pk
+        return resolver.is_project_author(project_pk)
 
 
 class IsCurrentUser(BasePermission):
@@ -72,51 +75,39 @@ class IsCurrentUser(BasePermission):
 
 class IsIssueAuthor(BasePermission):
     """
-    - Checking if the user is the author of the issue by checking if issue pk in url
-    is in the set of the issues of which the authenticated user is the author.
+    - Checking if the user is the author of the issue by comparing the author of the issue pk in url
+    with the authenticated user.
     - Message is changed if the issue does not exist at all.
     """
     message = "Access forbidden: You are not the author of the issue"
 
     def has_permission(self, request, view):
-        try:
-            issue_pk = int(request.resolver_match.kwargs['pk'])
-            issues_of_which_user_is_the_author = list(request.user.created_issues.all().values_list('pk', flat=True))
-
-            # Adapted message if issue does not exist:
-            Issue.objects.get(pk=issue_pk)
-
-            return issue_pk in issues_of_which_user_is_the_author
-        except AttributeError:
-            return False
+        issue_pk = int(request.resolver_match.kwargs['pk'])
+        author_pk = MembershipResolver.for_request(request).issue_author(issue_pk)
 
         # Adapted message if issue does not exist at all:
-        except ObjectDoesNotExist:
+        if author_pk is None:
             self.message = "Issue does not exist"
             return False
 
+        return author_pk == request.user.pk
+
 
 class IsCommentAuthor(BasePermission):
     """
-    - Checking if the user is the author of the comment by checking if comment pk in url
-    is in the set of the comments of which the authenticated user is the author.
-    - Message is changed if the issue does not exist at all.
+    - Checking if the user is the author of the comment by comparing the author of the comment pk in url
+    with the authenticated user.
+    - Message is changed if the comment does not exist at all.
     """
     message = "Access forbidden: You are not the author of the comment"
 
     def has_permission(self, request, view):
-        try:
-            comment_pk = int(request.resolver_match.kwargs['pk'])
-            comments_of_which_user_is_the_author = list(request.user.comments.all().values_list('pk', flat=True))
-
-            # Adapted message if comment does not exist:
-            Comment.objects.get(pk=comment_pk)
-            return comment_pk in comments_of_which_user_is_the_author
-
-        except AttributeError:
-            return False
+        comment_pk = int(request.resolver_match.kwargs['pk'])
+        author_pk = MembershipResolver.for_request(request).comment_author(comment_pk)
 
         # Adapted message if comment does not exist at all:
-        except ObjectDoesNotExist:
-            self.message = "Issue does not exist"
+        if author_pk is None:
+            self.message = "Comment does not exist"
             return False
+
+        return author_pk == request.user.pk
@@ -0,0 +1,88 @@
+from django.db import connection
+
+"""
+Full-text search over issues and comments, using the api_search_index FTS5 table
+created and kept in sync by triggers in migration 0006_search_index.
+"""
+
+# Matches in issue titles weigh more than matches in descriptions in the bm25 ranking:
+TITLE_WEIGHT = 5.0
+
+SEARCH_QUERY = """
+    SELECT rowid, kind FROM api_search_index
+    WHERE api_search_index MATCH %s
+    AND project_id IN (SELECT project_id_id FROM api_contributor WHERE user_id_id = %s)
+    ORDER BY bm25(api_search_index, %s, 1.0)
+    LIMIT %s OFFSET %s
+"""
+
+REBUILD_QUERIES = [
+    "DELETE FROM api_search_index",
+    """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT id * 2, title, description, 'issue', project_id_id, id FROM api_issue
+    """,
+    """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT api_comment.id * 2 + 1, '', api_comment.description, 'comment', api_issue.project_id_id, api_issue.id
+    FROM api_comment INNER JOIN api_issue ON api_issue.id = api_comment.issue_id_id
+    """,
+    "INSERT INTO api_search_index(api_search_index) VALUES ('optimize')",
+]
+
+
+INDEX_ISSUES_QUERY = """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT id * 2, title, description, 'issue', project_id_id, id FROM api_issue WHERE id BETWEEN %s AND %s
+"""
+
+INDEX_COMMENTS_QUERY = """
+    INSERT INTO api_search_index(rowid, title, body, kind, project_id, issue_id)
+    SELECT api_comment.id * 2 + 1, '', api_comment.description, 'comment', api_issue.project_id_id, api_issue.id
+    FROM api_comment INNER JOIN api_issue ON api_issue.id = api_comment.issue_id_id
+    WHERE api_comment.id BETWEEN %s AND %s
+"""
+
+
+def to_match_expression(text: str) -> str:
+    """
+    Converts user input to an FTS5 expression matching all of its words,
+    each word being quoted so that FTS5 operators in the input are not interpreted.
+    :param text: text typed by the user.
+    :return: FTS5 MATCH expression, or an empty string if there is no word.
+    """
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def search(user, text: str, limit: int, offset: int = 0):
+    """
+    Searches issues and comments of the projects of which the user is contributor, best matches first.
+    :return: list of (kind, pk) tuples, kind being 'issue' or 'comment'.
+    """
+    expression = to_match_expression(text)
+    if not expression:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_QUERY, [expression, user.pk, TITLE_WEIGHT, limit, offset])
+        return [(kind, rowid // 2) for rowid, kind in cursor.fetchall()]
+
+
+def rebuild_index():
+    """
+    Rebuilds the whole search index from issues and comments with set-based statements.
+    """
+    with connection.cursor() as cursor:
+        for query in REBUILD_QUERIES:
+            cursor.execute(query)
+
+
+def index_rows(issue_pks: tuple = None, comment_pks: tuple = None):
+    """
+    Indexes the issues and comments of the given (first pk, last pk) ranges with set-based statements,
+    for rows inserted while the index triggers were suspended (see importer.py).
+    """
+    with connection.cursor() as cursor:
+        if issue_pks:
+            cursor.execute(INDEX_ISSUES_QUERY, issue_pks)
+        if comment_pks:
+            cursor.execute(INDEX_COMMENTS_QUERY, comment_pks)
@@ -1,18 +1,45 @@
 from rest_framework import serializers
 from django.db import transaction
-from django.contrib.auth.hashers import make_password
+from django.db.models import Prefetch
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import Project, Issue, Comment, Contributor, CustomUser
+from .authentication import revoke_tokens
+from .hashing import make_password
+from .models import Project, Issue, Comment, Contributor, CustomUser, Job
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds is_active and token_version claims to tokens, checked by StatelessJWTAuthentication.
+    Refreshed access tokens inherit the claims of the refresh token.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_active'] = user.is_active
+        token['token_version'] = user.token_version
+        return token
 
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
-        fields = ['id', 'email', 'first_name', 'last_name', 'password']
+        fields = ['id', 'email', 'first_name', 'last_name', 'password', 'is_active']
+
+    def update(self, instance, validated_data):
+        """
+        Overloaded update method revoking the tokens of the user when the password changes
+        or the user is deactivated.
+        """
+        revoke = 'password' in validated_data or validated_data.get('is_active', instance.is_active) is False
+        instance = super().update(instance, validated_data)
+        if revoke:
+            revoke_tokens(instance.pk)
+        return instance
 
     def validate_password(self, value: str) -> str:
         """
-        Hash value passed by user.
+        Hash value passed by user, in the hashing pool (see hashing.py).
         Apparently necessary with custom user.
         :param value: password of a user
         :return: a hashed version of the password
@@ -87,19 +114,97 @@ class CreateIssueSerializer(serializers.ModelSerializer):
         ]
 
 
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field resolving objects from the pk -> object map loaded by a bulk list serializer
+    (see BulkIssueListSerializer), instead of running one query per item.
+    """
+    def to_internal_value(self, data):
+        objects = self.context.get('bulk_objects', {}).get(self.field_name)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BulkIssueListSerializer(serializers.ListSerializer):
+    """
+    List serializer validating issues one by one, so that invalid items are reported
+    without discarding valid ones. Assignees of all items are loaded in one query.
+    """
+    def validate_items(self):
+        """
+        :return: a tuple with the list of (index, validated data) of valid items
+        and the dict of errors of invalid items by index.
+        """
+        if not isinstance(self.initial_data, list):
+            raise serializers.ValidationError('Expected a list of issues.')
+        assignee_pks = set()
+        for item in self.initial_data:
+            if isinstance(item, dict) and str(item.get('assignee_user_id', '')).isdigit():
+                assignee_pks.add(int(item['assignee_user_id']))
+        self._context['bulk_objects'] = {'assignee_user_id': CustomUser.objects.in_bulk(assignee_pks)}
+
+        valid_items = []
+        errors = {}
+        for index, item in enumerate(self.initial_data):
+            try:
+                valid_items.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as e:
+                errors[index] = e.detail
+        return valid_items, errors
+
+
+class BulkCreateIssueSerializer(CreateIssueSerializer):
+    assignee_user_id = BulkPrimaryKeyRelatedField(queryset=CustomUser.objects.all(), allow_null=True, required=False)
+
+    class Meta(CreateIssueSerializer.Meta):
+        list_serializer_class = BulkIssueListSerializer
+
+
+class BulkIssueStatusSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Issue.STATUS_CHOICES)
+
+    class Meta:
+        list_serializer_class = BulkIssueListSerializer
+
+
 class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = ['id', 'title', 'description', 'type', 'author_user_id', 'contributors']
+        read_only_fields = ['author_user_id']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Loads what the serializer reads in batched queries: contributors pks are fetched
+        in one query for the whole queryset instead of one query per project.
+        """
+        return queryset.prefetch_related(
+            Prefetch('contributors', queryset=CustomUser.objects.only('pk'))
+        )
 
     def create(self, validated_data):
         """
         Overloaded Create method to automatically create contributor with user creating the project as author.
         """
         with transaction.atomic():
+            validated_data['author_user_id'] = self.context['request'].user
             project_instance = super().create(validated_data)
             contributor = Contributor.objects.create(
                 permission=Contributor.AUTHOR, project_id=project_instance, user_id=self.context['request'].user
             )
             contributor.save()
             return project_instance
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'task', 'status', 'attempts', 'result', 'error', 'created_time', 'finished_time']
@@ -0,0 +1,56 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .membership import invalidate_memberships
+from .models import Project, Contributor
+
+"""
+Signals keeping denormalized data in sync with the rows it is derived from.
+Registered in ApiConfig.ready().
+"""
+
+
+@receiver(post_save, sender=Contributor)
+def set_project_author(sender, instance, **kwargs):
+    """
+    Copies the user of an author Contributor row to Project.author_user_id.
+    """
+    if instance.permission != Contributor.AUTHOR:
+        return
+    # Project created along with its author (see ProjectSerializer.create) is already up to date:
+    if Contributor.project_id.is_cached(instance) and instance.project_id.author_user_id_id == instance.user_id_id:
+        return
+    Project.objects.filter(pk=instance.project_id_id).update(author_user_id=instance.user_id_id)
+
+
+@receiver(post_delete, sender=Contributor)
+def unset_project_author(sender, instance, **kwargs):
+    """
+    Clears Project.author_user_id when the author Contributor row is deleted.
+    """
+    if instance.permission != Contributor.AUTHOR:
+        return
+    Project.objects.filter(
+        pk=instance.project_id_id, author_user_id=instance.user_id_id
+    ).update(author_user_id=None)
+
+
+@receiver(pre_save, sender=Contributor)
+def invalidate_previous_user_memberships(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of the previous user of a Contributor row given to another user.
+    """
+    if instance.pk is None:
+        return
+    previous_user_pk = Contributor.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+    if previous_user_pk is not None and previous_user_pk != instance.user_id_id:
+        invalidate_memberships([previous_user_pk])
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_contributor_memberships(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of the user of a Contributor row (see membership.py).
+    """
+    invalidate_memberships([instance.user_id_id])
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import split_domain_port, validate_host
+from rest_framework import exceptions, status
+
+from .authentication import StatelessJWTAuthentication
+from .events import OVERFLOW, hub
+from .membership import MembershipResolver
+
+"""
+Server-Sent Events stream of the issue, comment and contributor events of a project (see api/events.py),
+served at /projects/<pk>/events/ by an ASGI application wrapping Django's (see SoftDesk/asgi.py).
+- Django 4.0 iterates streaming responses synchronously, blocking the event loop: connections are
+handled here in plain ASGI, each one being a coroutine waiting on its subscription queue.
+- Django's middlewares don't run on streams: the Host header is checked against ALLOWED_HOSTS as Django does,
+and the JWT of the Authorization header is checked, and the user's membership of the project, once at connect time,
+in a single sync_to_async hop. The stream is closed when the token expires, so that reconnecting clients
+present a valid token and are checked again.
+- A comment line is sent every EVENTS_HEARTBEAT seconds, so that proxies don't close idle connections.
+"""
+
+EVENTS_PATH = re.compile(r'^/projects/(?P<project_pk>[0-9]+)/events/$')
+
+
+class EventStreamApplication:
+    """
+    ASGI application serving event streams, passing other requests to application.
+    """
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = EVENTS_PATH.match(scope.get('path', '')) if scope['type'] == 'http' else None
+        if match is None:
+            return await self.application(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await self.send_json(
+                send, status.HTTP_405_METHOD_NOT_ALLOWED, {'detail': f'Method "{scope["method"]}" not allowed.'}
+            )
+        headers = dict(scope['headers'])
+        if not self.allowed_host(scope, headers):
+            return await self.send_json(send, status.HTTP_400_BAD_REQUEST, {'detail': 'Invalid Host header.'})
+        try:
+            expires = await sync_to_async(self.authorize)(
+                headers.get(b'authorization', b''), int(match.group('project_pk'))
+            )
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return await self.send_json(send, e.status_code, detail)
+        await self.stream(int(match.group('project_pk')), expires, receive, send)
+
+    @staticmethod
+    def allowed_host(scope, headers: dict) -> bool:
+        """
+        Host validation of HttpRequest.get_host(), with the host of the server if the header is missing.
+        """
+        host = headers.get(b'host', b'').decode('latin1')
+        if not host and scope.get('server'):
+            host = '%s:%s' % tuple(scope['server'])
+        allowed_hosts = settings.ALLOWED_HOSTS
+        if settings.DEBUG and not allowed_hosts:
+            allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+        domain, port = split_domain_port(host)
+        return bool(domain) and validate_host(domain, allowed_hosts)
+
+    @staticmethod
+    def authorize(header: bytes, project_pk: int) -> float:
+        """
+        :return: expiration timestamp of the token.
+        :raise APIException: if the token is invalid or the user is not contributor of the project.
+        """
+        authentication = StatelessJWTAuthentication()
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            raise exceptions.NotAuthenticated()
+        validated_token = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(validated_token)
+        resolver = MembershipResolver(user)
+        if resolver.project(project_pk) is None:
+            raise exceptions.NotFound()
+        if not resolver.is_project_contributor(project_pk):
+            raise exceptions.PermissionDenied("Access forbidden: You are not contributor of the project")
+        return validated_token['exp']
+
+    @staticmethod
+    async def send_json(send, status_code: int, data):
+        await send({
+            'type': 'http.response.start', 'status': status_code,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+    async def stream(self, project_pk: int, expires: float, receive, send):
+        subscription = hub.subscribe(project_pk)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start', 'status': status.HTTP_200_OK,
+                'headers': [
+                    (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await self.send_body(send, f'retry: {settings.EVENTS_RETRY * 1000}\n\n')
+            while True:
+                timeout = min(settings.EVENTS_HEARTBEAT, expires - time.time())
+                if timeout <= 0:
+                    break
+                event = asyncio.ensure_future(subscription.queue.get())
+                done, pending = await asyncio.wait(
+                    {event, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected in done:
+                    event.cancel()
+                    return
+                if event not in done:
+                    event.cancel()
+                    await self.send_body(send, ': heartbeat\n\n')
+                    continue
+                data = event.result()
+                event_id = f"id: {data['cursor']}\n" if 'cursor' in data else ''
+                await self.send_body(send, f"{event_id}event: {data['type']}\ndata: {json.dumps(data)}\n\n")
+                if data is OVERFLOW:
+                    break
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            hub.unsubscribe(subscription)
+            disconnected.cancel()
+
+    @staticmethod
+    async def send_body(send, text: str):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
@@ -0,0 +1,78 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import Project, Issue, IssueStat
+
+"""
+Issue statistics of projects, served from the IssueStat counters which SQLite triggers update on every write
+of issues (see migration 0012_issuestat), so that reading them costs one query whatever the number of issues.
+"""
+
+CHOICES = {
+    'status': Issue.STATUS_CHOICES,
+    'priority': Issue.PRIORITY_CHOICES,
+    'tag': Issue.TAG_CHOICES,
+}
+
+COUNT_INSERTED_QUERY = """
+    INSERT INTO api_issuestat(project_pk, field, value, count)
+    SELECT project_id_id, %s, {field}, count(*) FROM api_issue
+    WHERE id BETWEEN %s AND %s GROUP BY project_id_id, {field}
+    ON CONFLICT(project_pk, field, value) DO UPDATE SET count = count + excluded.count
+"""
+
+UPSERT = (
+    "INSERT INTO api_issuestat(project_pk, field, value, count) VALUES (%s, %s, %s, %s) "
+    "ON CONFLICT(project_pk, field, value) DO UPDATE SET count = excluded.count"
+)
+
+
+def project_stats(project_pk: int) -> dict:
+    """
+    :return: {'total': number of issues, 'status': {value: count}, 'priority': {...}, 'tag': {...}},
+    every choice of the fields being listed.
+    """
+    stats = {field: {value: 0 for value, label in choices} for field, choices in CHOICES.items()}
+    for field, value, count in IssueStat.objects.filter(project_pk=project_pk).values_list('field', 'value', 'count'):
+        stats[field][value] = count
+    return {'total': sum(stats['status'].values()), **stats}
+
+
+def count_inserted(issue_pks: tuple):
+    """
+    Counts issues inserted with the stats trigger suspended (see importer.py), with one GROUP BY per field.
+    :param issue_pks: (first pk, last pk) range of the inserted issues.
+    """
+    with connection.cursor() as cursor:
+        for field in IssueStat.FIELDS:
+            cursor.execute(COUNT_INSERTED_QUERY.format(field=field), [field, *issue_pks])
+
+
+def reconcile() -> list:
+    """
+    Counts the issues of all projects in one GROUP BY pass, and fixes the counters which drifted.
+    :return: list of (project pk, field, value, stored count, actual count) of the fixed counters.
+    """
+    with transaction.atomic():
+        # Being a write, this takes the lock of the database, so that no issue is written until counters are fixed:
+        IssueStat.objects.exclude(project_pk__in=Project.objects.values('pk')).delete()
+        actual = Counter()
+        groups = Issue.objects.order_by().values('project_id', *IssueStat.FIELDS).annotate(
+            count=Count('id')
+        ).values_list('project_id', *IssueStat.FIELDS, 'count')
+        for project_pk, status, priority, tag, count in groups:
+            for field, value in zip(IssueStat.FIELDS, (status, priority, tag)):
+                actual[(project_pk, field, value)] += count
+        rows = IssueStat.objects.values_list('project_pk', 'field', 'value', 'count')
+        stored = {(project_pk, field, value): count for project_pk, field, value, count in rows}
+        drifts = [
+            (*key, stored.get(key, 0), actual[key]) for key in sorted(stored.keys() | actual.keys())
+            if stored.get(key, 0) != actual[key]
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(UPSERT, [
+                (project_pk, field, value, count) for project_pk, field, value, stored_count, count in drifts
+            ])
+    return drifts
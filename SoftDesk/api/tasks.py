@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from .authentication import revoke_tokens
+from .changes import compact
+from .deletion import delete_account
+from .jobs import task
+from .models import CustomUser
+from .search import rebuild_index
+from .stats import reconcile
+
+"""
+Tasks run by the job queue (see jobs.py). Registered when the app is ready.
+"""
+
+
+@task('delete_account')
+def delete_account_task(user_pk: int, chunk_size: int):
+    delete_account(user_pk, chunk_size)
+    revoke_tokens(user_pk)
+
+
+@task('rebuild_search_index')
+def rebuild_search_index_task():
+    with transaction.atomic():
+        rebuild_index()
+
+
+@task('compact_change_log')
+def compact_change_log_task(retention: int):
+    """
+    :return: number of deleted change log entries.
+    """
+    return compact(retention)
+
+
+@task('bulk_create_issues')
+def bulk_create_issues_task(project_pk: int, user_pk: int, items: list):
+    """
+    :return: the response data of a bulk issue creation, see IssueViewSet.bulk_create.
+    """
+    from .views import IssueViewSet
+    results, errors = IssueViewSet.create_issues(project_pk, CustomUser.objects.get(pk=user_pk), items)
+    return {'results': results, 'errors': errors}
+
+
+@task('reconcile_issue_stats')
+def reconcile_issue_stats_task():
+    """
+    :return: number of fixed counters.
+    """
+    return len(reconcile())
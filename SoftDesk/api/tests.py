@@ -1,3 +1,1519 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from SoftDesk import asgi
+
+from . import authentication, benchmark, events, hashing, jobs
+from .cache import list_cache
+from .database import replica_reads, sticky_key
+from .deletion import delete_account
+from .importer import Importer
+from .middleware import request_timing_middleware
+from .membership import get_memberships, membership_cache, membership_version
+from .models import Project, Contributor, Issue, Comment, CustomUser, Job, CollectionVersion, Change, ImportCheckpoint,\
+    IssueStat
+from .serializers import CommentSerializer, IssueSerializer, VersionedTokenObtainPairSerializer
+from .stats import project_stats
+
+
+# Timing log lines of sampled requests are only written by RequestTimingTests:
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+class SoftDeskAPITestCase(APITestCase):
+    """
+    Base test case creating an author, a contributor and an outsider,
+    with one project, one issue and one comment written by the author.
+    """
+    def setUp(self):
+        # Cached pages are keyed by versions which are rolled back between tests:
+        for cache in caches.all():
+            cache.clear()
+        self.author = CustomUser.objects.create_user('author@softdesk.com', 'password')
+        self.contributor = CustomUser.objects.create_user('contributor@softdesk.com', 'password')
+        self.outsider = CustomUser.objects.create_user('outsider@softdesk.com', 'password')
+        self.project = self.create_project('Project', self.author)
+        Contributor.objects.create(
+            user_id=self.contributor, project_id=self.project, permission=Contributor.CONTRIBUTOR, role='Dev'
+        )
+        self.issue = Issue.objects.create(
+            title='Issue', tag=Issue.BUG, priority=Issue.ELEVEE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+        )
+        self.comment = Comment.objects.create(
+            description='Comment', issue_id=self.issue, author_user_id=self.author
+        )
+
+    @staticmethod
+    def create_project(title, author):
+        project = Project.objects.create(title=title, description='Description', type=Project.BACK_END)
+        Contributor.objects.create(user_id=author, project_id=project, permission=Contributor.AUTHOR)
+        return project
+
+    def project_url(self, project=None):
+        return f'/projects/{(project or self.project).pk}/'
+
+    def issue_url(self, issue=None):
+        issue = issue or self.issue
+        return f'/projects/{issue.project_id_id}/issues/{issue.pk}/'
+
+    def comment_url(self, comment=None):
+        comment = comment or self.comment
+        return f'{self.issue_url(comment.issue_id)}comments/{comment.pk}/'
+
+
+class PermissionsTests(SoftDeskAPITestCase):
+    def test_contributor_can_read_issues(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_outsider_is_forbidden(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], "Access forbidden: You are not contributor of the project")
+
+    def test_unknown_project_message(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.get('/projects/999/issues/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], "Project does not exist")
+
+    def test_only_project_author_can_update_project(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.put(self.project_url(), {'description': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.author)
+        response = self.client.put(self.project_url(), {'description': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_only_comment_author_can_delete_comment(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.delete(self.comment_url())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], "Access forbidden: You are not the author of the comment")
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(self.comment_url())
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_permission_checks_do_not_scale_with_user_history(self):
+        """
+        Membership and authorship are resolved with one query each,
+        whatever the number of projects and comments of the user.
+        """
+        for i in range(20):
+            project = self.create_project(f'Other project {i}', self.author)
+            issue = Issue.objects.create(
+                title='Issue', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+                project_id=project, author_user_id=self.author, assignee_user_id=self.author
+            )
+            Comment.objects.create(description='Comment', issue_id=issue, author_user_id=self.author)
+        self.client.force_authenticate(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.comment_url(), {'description': 'Updated'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        permission_queries = [
+            query for query in queries.captured_queries
+            if 'api_contributor' in query['sql'] or 'SELECT "api_comment"."author_user_id_id"' in query['sql']
+        ]
+        self.assertEqual(len(permission_queries), 2)
+
+
+class ProjectAuthorTests(SoftDeskAPITestCase):
+    def test_author_column_follows_contributor_rows(self):
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.author_user_id_id, self.author.pk)
+        Contributor.objects.filter(project_id=self.project, permission=Contributor.AUTHOR).delete()
+        self.project.refresh_from_db()
+        self.assertIsNone(self.project.author_user_id)
+
+    def test_created_project_has_author(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.post('/projects/', {'title': 'New', 'description': 'New', 'type': Project.IOS})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author_user_id'], self.contributor.pk)
+        self.assertTrue(Project.objects.filter(pk=response.data['id'], author_user_id=self.contributor).exists())
+
+    def test_listing_projects_does_not_query_authors(self):
+        for i in range(5):
+            self.create_project(f'Other project {i}', self.author)
+        self.client.force_authenticate(self.author)
+        get_memberships(self.author.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/projects/')
+        self.assertEqual(len(response.data['results']), 6)
+        author_queries = [
+            query for query in queries.captured_queries if '"api_contributor"."permission"' in query['sql']
+        ]
+        self.assertFalse(author_queries)
+
+
+class ProjectQueryCountTests(SoftDeskAPITestCase):
+    def assert_list_query_count(self, number_of_projects):
+        for i in range(number_of_projects - 1):
+            project = self.create_project(f'Other project {i}', self.author)
+            Contributor.objects.create(
+                user_id=self.contributor, project_id=project, permission=Contributor.CONTRIBUTOR, role='Dev'
+            )
+        self.client.force_authenticate(self.author)
+        get_memberships(self.author.pk)
+        # Version of the list for conditional requests, projects, and all their contributors, memberships being cached:
+        with self.assertNumQueries(3):
+            response = self.client.get('/projects/')
+        self.assertEqual(len(response.data['results']), min(number_of_projects, 50))
+        self.assertEqual(sorted(response.data['results'][0]['contributors']), [self.author.pk, self.contributor.pk])
+
+    def test_list_1_project(self):
+        self.assert_list_query_count(1)
+
+    def test_list_10_projects(self):
+        self.assert_list_query_count(10)
+
+    def test_list_100_projects(self):
+        self.assert_list_query_count(100)
+
+    def test_retrieve_project(self):
+        self.client.force_authenticate(self.author)
+        # Membership, version, project and contributors:
+        with self.assertNumQueries(4):
+            response = self.client.get(self.project_url())
+        self.assertEqual(sorted(response.data['contributors']), [self.author.pk, self.contributor.pk])
+
+
+class MembershipCacheTests(SoftDeskAPITestCase):
+    def test_member_permission_check_is_served_from_cache(self):
+        self.client.force_authenticate(self.contributor)
+        self.client.get(f'{self.project_url()}issues/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if 'api_contributor' in query['sql']])
+
+    def test_added_contributor_is_seen_at_once(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.project_url()).status_code, status.HTTP_403_FORBIDDEN)
+        Contributor.objects.create(user_id=self.outsider, project_id=self.project, permission=Contributor.CONTRIBUTOR)
+        self.assertEqual(self.client.get(self.project_url()).status_code, status.HTTP_200_OK)
+
+    def test_removed_contributor_is_seen_at_once(self):
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(self.project_url()).status_code, status.HTTP_200_OK)
+        Contributor.objects.filter(user_id=self.contributor, project_id=self.project).delete()
+        self.assertEqual(self.client.get(self.project_url()).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/projects/').data['results'], [])
+
+    def test_account_deletion_invalidates_members_of_deleted_projects(self):
+        self.assertIn(self.project.pk, get_memberships(self.contributor.pk))
+        delete_account(self.author.pk)
+        self.assertEqual(get_memberships(self.contributor.pk), {})
+
+    def test_map_read_before_a_change_is_not_served(self):
+        """
+        A map read from the database by a concurrent request before the change is committed,
+        and cached after it is invalidated, is stored under the replaced stamp.
+        """
+        version = membership_version(self.outsider.pk)
+        Contributor.objects.create(user_id=self.outsider, project_id=self.project, permission=Contributor.CONTRIBUTOR)
+        membership_cache().set(f'membership:{self.outsider.pk}:{version}', {}, None)
+        self.assertIn(self.project.pk, get_memberships(self.outsider.pk))
+
+
+class PaginationTests(SoftDeskAPITestCase):
+    def test_issues_are_paged_with_a_cursor(self):
+        for i in range(4):
+            Issue.objects.create(
+                title=f'Issue {i}', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+                project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+            )
+        self.client.force_authenticate(self.contributor)
+        url = f'{self.project_url()}issues/?page_size=2'
+        titles = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            titles += [issue['title'] for issue in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, ['Issue', 'Issue 0', 'Issue 1', 'Issue 2', 'Issue 3'])
+
+    def test_contributors_and_comments_are_paged(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f'{self.project_url()}users/')
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(f'{self.issue_url()}comments/')
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class QueryPlanTests(SoftDeskAPITestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every SELECT issued by the read endpoints,
+    failing if one of them falls back to a full table scan or sorts the rows itself.
+    """
+    def assert_indexed_queries(self, url, allow_sort=False):
+        self.client.force_authenticate(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    self.assertFalse(
+                        detail.startswith('SCAN ') and 'INDEX' not in detail, f"{detail} in {query['sql']}"
+                    )
+                    if not allow_sort:
+                        self.assertNotIn('TEMP B-TREE FOR ORDER BY', detail, query['sql'])
+
+    def test_project_endpoints(self):
+        # Projects of the user are found through the contributor index then sorted,
+        # the sort being bounded by the number of projects of the user:
+        self.assert_indexed_queries('/projects/', allow_sort=True)
+        self.assert_indexed_queries(self.project_url())
+
+    def test_contributor_endpoints(self):
+        self.assert_indexed_queries(f'{self.project_url()}users/')
+
+    def test_issue_endpoints(self):
+        self.assert_indexed_queries(f'{self.project_url()}issues/')
+        self.assert_indexed_queries(self.issue_url())
+
+    def test_comment_endpoints(self):
+        self.assert_indexed_queries(f'{self.issue_url()}comments/')
+        self.assert_indexed_queries(self.comment_url())
+
+    def test_issue_filter_endpoints(self):
+        for query_string in (
+            f'status={Issue.A_FAIRE}', f'priority={Issue.ELEVEE}', f'tag={Issue.BUG}',
+            f'assignee_user_id={self.author.pk}', f'author_user_id={self.author.pk}',
+            'created_after=2020-01-01T00:00:00Z', 'ordering=-created_time',
+            f'status={Issue.A_FAIRE}&ordering=-created_time',
+        ):
+            self.assert_indexed_queries(f'{self.project_url()}issues/?{query_string}')
+
+
+class IssueFilterTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        Issue.objects.create(
+            title='Task', tag=Issue.TACHE, priority=Issue.FAIBLE, status=Issue.TERMINE,
+            project_id=self.project, author_user_id=self.contributor, assignee_user_id=self.contributor
+        )
+        self.client.force_authenticate(self.author)
+
+    def get_titles(self, query_string):
+        response = self.client.get(f'{self.project_url()}issues/?{query_string}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [issue['title'] for issue in response.data['results']]
+
+    def test_choice_filters(self):
+        self.assertEqual(self.get_titles(f'status={Issue.TERMINE}'), ['Task'])
+        self.assertEqual(self.get_titles(f'priority={Issue.ELEVEE}'), ['Issue'])
+        self.assertEqual(self.get_titles(f'tag={Issue.TACHE}&status={Issue.A_FAIRE}'), [])
+
+    def test_user_filters(self):
+        self.assertEqual(self.get_titles(f'author_user_id={self.contributor.pk}'), ['Task'])
+        self.assertEqual(self.get_titles(f'assignee_user_id={self.author.pk}'), ['Issue'])
+
+    def test_created_time_range_and_ordering(self):
+        self.assertEqual(self.get_titles('created_before=2000-01-01T00:00:00Z'), [])
+        self.assertEqual(self.get_titles('created_after=2000-01-01T00:00:00Z'), ['Issue', 'Task'])
+        self.assertEqual(self.get_titles('ordering=-created_time'), ['Task', 'Issue'])
+
+    def test_invalid_filters(self):
+        response = self.client.get(f'{self.project_url()}issues/?status=XX&assignee_user_id=me')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'status', 'assignee_user_id'})
+        for query_string in (
+            'created_after=2021-13-45T00:00:00', 'created_after=2021-02-30T00:00',
+            'assignee_user_id=99999999999999999999999',
+        ):
+            response = self.client.get(f'{self.project_url()}issues/?{query_string}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(set(response.data), {query_string.split('=')[0]})
+
+
+class SearchTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_project = self.create_project('Other project', self.outsider)
+        Issue.objects.create(
+            title='Login crash', description='Crash on login page', tag=Issue.BUG, priority=Issue.ELEVEE,
+            status=Issue.A_FAIRE, project_id=self.other_project, author_user_id=self.outsider,
+            assignee_user_id=self.outsider
+        )
+        self.crash = Issue.objects.create(
+            title='Crash at startup', description='App crashes', tag=Issue.BUG, priority=Issue.ELEVEE,
+            status=Issue.A_FAIRE, project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+        )
+        Comment.objects.create(description='Also a crash on Android', issue_id=self.issue, author_user_id=self.author)
+        self.client.force_authenticate(self.contributor)
+
+    def search(self, query_string):
+        response = self.client.get(f'/search/?{query_string}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_search_is_limited_to_projects_of_user(self):
+        results = self.search('q=crash').data['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], {'type': 'issue', 'data': IssueSerializer(self.crash).data})
+        self.assertEqual(results[1]['type'], 'comment')
+
+    def test_index_follows_updates_and_deletes(self):
+        self.crash.title = 'Freeze at startup'
+        self.crash.save()
+        self.assertEqual(len(self.search('q=startup freeze').data['results']), 1)
+        self.issue.delete()
+        self.assertEqual(len(self.search('q=android').data['results']), 0)
+
+    def test_index_follows_moved_issues(self):
+        Issue.objects.filter(pk=self.issue.pk).update(project_id=self.other_project)
+        self.assertEqual(self.search('q=android').data['results'], [])
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(len(self.search('q=android').data['results']), 1)
+
+    def test_index_follows_moved_comments(self):
+        Comment.objects.filter(description__contains='Android').update(
+            issue_id=Issue.objects.get(title='Login crash')
+        )
+        self.assertEqual(self.search('q=android').data['results'], [])
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(len(self.search('q=android').data['results']), 1)
+
+    def test_stale_index_rows_are_not_served(self):
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE api_search_index SET project_id = %s', [self.project.pk])
+        results = self.search('q=crash').data['results']
+        self.assertEqual(len(results), 2)
+        self.assertNotIn('Login crash', [result['data'].get('title') for result in results])
+
+    def test_search_is_paginated(self):
+        response = self.search('q=crash&page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_and_offset_are_bounded(self):
+        for page_size in (0, -1):
+            response = self.search(f'q=crash&page_size={page_size}')
+            self.assertEqual(len(response.data['results']), 1)
+            self.assertIn('offset=1', response.data['next'])
+        response = self.client.get('/search/?q=crash&offset=-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_operators_are_not_interpreted(self):
+        self.assertEqual(self.search('q="crash OR (').data['results'], [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM api_search_index')
+        self.assertEqual(self.search('q=crash').data['results'], [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('q=crash').data['results']), 2)
+
+
+class BulkIssueTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+        self.url = f'{self.project_url()}issues/bulk/'
+
+    @staticmethod
+    def issue_data(title, **kwargs):
+        return {'title': title, 'tag': Issue.TACHE, 'priority': Issue.MOYENNE, 'status': Issue.A_FAIRE, **kwargs}
+
+    def test_bulk_create(self):
+        data = [self.issue_data(f'Task {i}', assignee_user_id=self.author.pk) for i in range(50)]
+        # Membership, assignees, existing titles, and the insert between savepoint queries:
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertEqual(Issue.objects.filter(project_id=self.project, author_user_id=self.contributor).count(), 50)
+
+    def test_bulk_create_reports_invalid_items(self):
+        data = [
+            self.issue_data('Task'),
+            self.issue_data('Issue'),
+            self.issue_data('Task'),
+            self.issue_data('Other task', priority='XX'),
+            self.issue_data('Unassigned', assignee_user_id=999),
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([issue['title'] for issue in response.data['results']], ['Task'])
+        self.assertEqual(response.data['results'][0]['assignee_user_id'], self.contributor.pk)
+        self.assertEqual(set(response.data['errors']), {1, 2, 3, 4})
+
+    def test_bulk_status_update(self):
+        own_issue = Issue.objects.create(
+            title='Own issue', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.contributor, assignee_user_id=self.contributor
+        )
+        data = [
+            {'id': own_issue.pk, 'status': Issue.TERMINE},
+            {'id': self.issue.pk, 'status': Issue.TERMINE},
+            {'id': 999, 'status': Issue.TERMINE},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(set(response.data['errors']), {1, 2})
+        own_issue.refresh_from_db()
+        self.issue.refresh_from_db()
+        self.assertEqual(own_issue.status, Issue.TERMINE)
+        self.assertEqual(self.issue.status, Issue.A_FAIRE)
+
+    def test_outsider_is_forbidden(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post(self.url, [self.issue_data('Task')], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConditionalGetTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+
+    def assert_not_modified_until_write(self, url, write):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        # Version lookup only, memberships being cached:
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        write()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_issue_list(self):
+        def write():
+            Issue.objects.filter(pk=self.issue.pk).update(status=Issue.TERMINE)
+        self.assert_not_modified_until_write(f'{self.project_url()}issues/', write)
+
+    def test_issue_list_follows_moved_issues(self):
+        def write():
+            project = self.create_project('Other project', self.author)
+            Issue.objects.filter(pk=self.issue.pk).update(project_id=project)
+        self.assert_not_modified_until_write(f'{self.project_url()}issues/', write)
+
+    def test_comment_list_follows_cascade_deletes(self):
+        def write():
+            Comment.objects.filter(issue_id=self.issue).delete()
+        self.assert_not_modified_until_write(f'{self.issue_url()}comments/', write)
+
+    def test_project_detail_follows_contributors(self):
+        def write():
+            Contributor.objects.create(
+                user_id=self.outsider, project_id=self.project, permission=Contributor.CONTRIBUTOR
+            )
+        self.assert_not_modified_until_write(self.project_url(), write)
+
+    def test_project_list_follows_other_projects(self):
+        def write():
+            project = self.create_project('Other project', self.author)
+            Contributor.objects.create(
+                user_id=self.contributor, project_id=project, permission=Contributor.CONTRIBUTOR
+            )
+        response = self.client.get('/projects/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        write()
+        response = self.client.get('/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        Issue.objects.filter(pk=self.issue.pk).update(status=Issue.TERMINE)
+        response = self.client.get(f'{self.project_url()}issues/')
+        response = self.client.get(f'{self.project_url()}issues/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_parameters_change_etag(self):
+        etag = self.client.get(f'{self.project_url()}issues/')['ETag']
+        response = self.client.get(f'{self.project_url()}issues/?status=TE', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ListCacheTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+
+    def test_second_read_is_a_hit(self):
+        url = f'{self.project_url()}issues/'
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        # Version lookup only, memberships being cached:
+        with self.assertNumQueries(1):
+            cached_response = self.client.get(url)
+        self.assertEqual(cached_response['X-Cache'], 'HIT')
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(list_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_moved_comment_leaves_the_cached_page(self):
+        url = f'{self.issue_url()}comments/'
+        etag = self.client.get(url)['ETag']
+        other_issue = Issue.objects.create(
+            title='Other', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+        )
+        self.client.force_authenticate(self.author)
+        response = self.client.put(self.comment_url(), {'description': 'Moved', 'issue_id': other_issue.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_write_invalidates_pages(self):
+        url = f'{self.issue_url()}comments/'
+        self.client.get(url)
+        Comment.objects.create(description='New comment', issue_id=self.issue, author_user_id=self.contributor)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_rgpd_deletion_invalidates_pages(self):
+        url = f'{self.issue_url()}comments/'
+        Comment.objects.create(description='New comment', issue_id=self.issue, author_user_id=self.outsider)
+        self.client.get(url)
+        self.client.force_authenticate(self.outsider)
+        self.client.delete(f'/rgpd/{self.outsider.pk}/')
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class ChangeLogTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+        self.url = f'{self.project_url()}changes/'
+        self.cursor = self.client.get(self.url).data['cursor']
+
+    def changes(self, since=None):
+        response = self.client.get(self.url, {'since': self.cursor if since is None else since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_history_of_the_project(self):
+        changes = self.changes(since=0)['changes']
+        author, contributor = self.project.users.order_by('pk').values_list('pk', flat=True)
+        # The project is listed after its author, whose creation updated the project's author column:
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in changes],
+            [('contributor', author, 'create'), ('project', self.project.pk, 'create'),
+             ('contributor', contributor, 'create'), ('issue', self.issue.pk, 'create'),
+             ('comment', self.comment.pk, 'create')]
+        )
+        self.assertEqual(changes[-1]['data'], CommentSerializer(self.comment).data)
+
+    def test_deltas_and_tombstones(self):
+        issue = Issue.objects.create(
+            title='New', tag=Issue.TACHE, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+        )
+        Issue.objects.filter(pk=issue.pk).update(status=Issue.EN_COURS)
+        Issue.objects.filter(pk=issue.pk).update(status=Issue.TERMINE)
+        deleted_pk = self.issue.pk
+        self.issue.delete()
+        data = self.changes()
+        self.assertFalse(data['has_more'])
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in data['changes']],
+            [('issue', issue.pk, 'create'), ('comment', self.comment.pk, 'delete'), ('issue', deleted_pk, 'delete')]
+        )
+        self.assertEqual(data['changes'][0]['data']['status'], Issue.TERMINE)
+        self.assertIsNone(data['changes'][2]['data'])
+        self.assertEqual(self.changes(since=data['cursor'])['changes'], [])
+
+    def test_moved_issue_leaves_a_tombstone(self):
+        project = self.create_project('Other project', self.contributor)
+        Issue.objects.filter(pk=self.issue.pk).update(project_id=project)
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in self.changes()['changes']],
+            [('comment', self.comment.pk, 'delete'), ('issue', self.issue.pk, 'delete')]
+        )
+        self.url = f'{self.project_url(project)}changes/'
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in self.changes(since=0)['changes'][-2:]],
+            [('issue', self.issue.pk, 'create'), ('comment', self.comment.pk, 'create')]
+        )
+
+    def test_moved_comment_leaves_a_tombstone(self):
+        project = self.create_project('Other project', self.contributor)
+        issue = Issue.objects.create(
+            title='Other', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=project, author_user_id=self.contributor, assignee_user_id=self.contributor
+        )
+        Comment.objects.filter(pk=self.comment.pk).update(issue_id=issue)
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in self.changes()['changes']],
+            [('comment', self.comment.pk, 'delete')]
+        )
+        self.url = f'{self.project_url(project)}changes/'
+        self.assertEqual(
+            [(change['type'], change['id'], change['action']) for change in self.changes(since=0)['changes'][-1:]],
+            [('comment', self.comment.pk, 'create')]
+        )
+
+    def test_negative_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'since': -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_projects_are_not_listed(self):
+        project = self.create_project('Other project', self.contributor)
+        Project.objects.filter(pk=project.pk).update(description='Changed')
+        self.assertEqual(self.changes()['changes'], [])
+
+    @override_settings(CHANGES_PAGE_SIZE=2)
+    def test_changes_are_paged(self):
+        for i in range(3):
+            Comment.objects.create(description=f'Reply {i}', issue_id=self.issue, author_user_id=self.author)
+        first = self.changes()
+        self.assertTrue(first['has_more'])
+        second = self.changes(since=first['cursor'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(
+            [change['data']['description'] for change in first['changes'] + second['changes']],
+            ['Reply 0', 'Reply 1', 'Reply 2']
+        )
+
+    def test_imported_rows_are_logged(self):
+        Importer('changes').run([json.dumps({'issue': {
+            'title': 'Imported', 'tag': Issue.BUG, 'priority': Issue.FAIBLE, 'status': Issue.A_FAIRE,
+            'author': 'author@softdesk.com', 'comments': [{'description': 'Reply', 'author': 'author@softdesk.com'}]
+        }})])
+        self.assertEqual([(change['type'], change['action']) for change in self.changes()['changes']], [])
+        ImportCheckpoint.objects.update(project_pk=self.project.pk, line=0)
+        Importer('changes').run([json.dumps({'issue': {
+            'title': 'Imported', 'tag': Issue.BUG, 'priority': Issue.FAIBLE, 'status': Issue.A_FAIRE,
+            'author': 'author@softdesk.com', 'comments': [{'description': 'Reply', 'author': 'author@softdesk.com'}]
+        }})])
+        self.assertEqual(
+            [(change['type'], change['action']) for change in self.changes()['changes']],
+            [('issue', 'create'), ('comment', 'create')]
+        )
+
+    def test_compacted_cursor_is_gone(self):
+        call_command('compact_change_log', '--retention', '0', stdout=StringIO())
+        self.assertFalse(Change.objects.exists())
+        response = self.client.get(self.url, {'since': 0})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.changes()['changes'], [])
+
+    def test_compaction_keeps_recent_entries(self):
+        call_command('compact_change_log', stdout=StringIO())
+        self.assertEqual(len(self.changes(since=0)['changes']), 5)
+
+    def test_outsider_is_forbidden(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssueStatsTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.author)
+        self.url = f'{self.project_url()}stats/'
+
+    def create_issues(self, number, issue_status=Issue.A_FAIRE):
+        return Issue.objects.bulk_create(
+            Issue(
+                title=f'Issue {i}', tag=Issue.TACHE, priority=Issue.FAIBLE, status=issue_status,
+                project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+            )
+            for i in range(number)
+        )
+
+    def assert_stats(self, status_counts, priority_counts, tag_counts):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': sum(status_counts),
+            'status': dict(zip([Issue.A_FAIRE, Issue.EN_COURS, Issue.TERMINE], status_counts)),
+            'priority': dict(zip([Issue.FAIBLE, Issue.MOYENNE, Issue.ELEVEE], priority_counts)),
+            'tag': dict(zip([Issue.BUG, Issue.AMELIORATION, Issue.TACHE], tag_counts)),
+        })
+
+    def test_counters_follow_writes(self):
+        self.assert_stats([1, 0, 0], [0, 0, 1], [1, 0, 0])
+        issues = self.create_issues(3)
+        self.assert_stats([4, 0, 0], [3, 0, 1], [1, 0, 3])
+        response = self.client.put(self.issue_url(), {'status': Issue.EN_COURS, 'priority': Issue.MOYENNE})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_stats([3, 1, 0], [3, 1, 0], [1, 0, 3])
+        response = self.client.patch(
+            f'{self.project_url()}issues/bulk/', [{'id': issue.pk, 'status': Issue.TERMINE} for issue in issues],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_stats([0, 1, 3], [3, 1, 0], [1, 0, 3])
+        self.client.delete(self.issue_url(issues[0]))
+        self.assert_stats([0, 1, 2], [2, 1, 0], [1, 0, 2])
+
+    def test_reading_is_one_query(self):
+        self.create_issues(100)
+        get_memberships(self.author.pk)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_deleted_project_has_no_stats(self):
+        self.client.delete(self.project_url())
+        self.assertFalse(IssueStat.objects.filter(project_pk=self.project.pk).exists())
+
+    def test_account_deletion_updates_counters(self):
+        project = self.create_project('Contributor project', self.contributor)
+        Issue.objects.create(
+            title='Contributor issue', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.contributor, assignee_user_id=self.contributor
+        )
+        delete_account(self.contributor.pk)
+        self.assert_stats([1, 0, 0], [0, 0, 1], [1, 0, 0])
+        self.assertFalse(IssueStat.objects.filter(project_pk=project.pk).exists())
+
+    def test_reconcile_fixes_drift(self):
+        self.create_issues(2, Issue.TERMINE)
+        IssueStat.objects.filter(project_pk=self.project.pk, field='status', value=Issue.TERMINE).update(count=7)
+        IssueStat.objects.filter(project_pk=self.project.pk, field='tag').delete()
+        IssueStat.objects.create(project_pk=999, field='status', value=Issue.A_FAIRE, count=1)
+        out = StringIO()
+        call_command('reconcile_issue_stats', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            f'Project {self.project.pk} status {Issue.TERMINE}: 7 -> 2',
+            f'Project {self.project.pk} tag {Issue.BUG}: 0 -> 1',
+            f'Project {self.project.pk} tag {Issue.TACHE}: 0 -> 2',
+            '3 issue stats fixed.',
+        ])
+        self.assert_stats([1, 0, 2], [2, 0, 1], [1, 0, 2])
+        self.assertFalse(IssueStat.objects.filter(project_pk=999).exists())
+        out = StringIO()
+        call_command('reconcile_issue_stats', stdout=out)
+        self.assertEqual(out.getvalue(), '0 issue stats fixed.\n')
+
+    def test_outsider_is_forbidden(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StatelessAuthenticationTests(SoftDeskAPITestCase):
+    def login(self, email='contributor@softdesk.com', password='password'):
+        response = self.client.post('/login/', {'email': email, 'password': password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_user_is_not_loaded_from_database(self):
+        self.login()
+        self.client.get(f'{self.project_url()}issues/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if 'FROM "api_customuser"' in query['sql']])
+
+    def test_password_change_revokes_tokens(self):
+        self.login()
+        response = self.client.put(f'/rgpd/{self.contributor.pk}/', {'password': 'new password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.login(password='new password')
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivation_revokes_tokens(self):
+        self.login()
+        response = self.client.put(f'/rgpd/{self.contributor.pk}/', {'is_active': False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_version_read_before_revocation_is_not_cached(self):
+        self.login()
+        read_token_version = authentication.read_token_version
+        calls = []
+
+        def read_then_revoke(user_pk):
+            # The tokens are revoked by another request after this one read the version:
+            version = read_token_version(user_pk)
+            if not calls:
+                calls.append(user_pk)
+                authentication.revoke_tokens(user_pk)
+            return version
+        cache.clear()
+        with patch('api.authentication.read_token_version', side_effect=read_then_revoke):
+            response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deletion_revokes_tokens(self):
+        self.login()
+        response = self.client.delete(f'/rgpd/{self.contributor.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get('/projects/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AccountDeletionTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Contributor writes in the author's project, and is the author of a project of their own:
+        self.other_issue = Issue.objects.create(
+            title='Other issue', tag=Issue.TACHE, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.project, author_user_id=self.contributor, assignee_user_id=self.author
+        )
+        Comment.objects.create(description='Author reply', issue_id=self.other_issue, author_user_id=self.author)
+        Comment.objects.create(description='Contributor reply', issue_id=self.issue, author_user_id=self.contributor)
+        Issue.objects.filter(pk=self.issue.pk).update(assignee_user_id=self.contributor)
+        self.contributor_project = self.create_project('Contributor project', self.contributor)
+        Issue.objects.create(
+            title='Contributor project issue', tag=Issue.BUG, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+            project_id=self.contributor_project, author_user_id=self.contributor, assignee_user_id=self.contributor
+        )
+
+    def assert_account_deleted(self):
+        self.assertFalse(CustomUser.objects.filter(pk=self.contributor.pk).exists())
+        self.assertFalse(Project.objects.filter(pk=self.contributor_project.pk).exists())
+        self.assertFalse(Contributor.objects.filter(user_id=self.contributor.pk).exists())
+        self.assertFalse(Issue.objects.filter(author_user_id=self.contributor.pk).exists())
+        self.assertFalse(Comment.objects.filter(author_user_id=self.contributor.pk).exists())
+        # Only the contributor's issue and the author's reply to it are gone from the author's project:
+        self.assertEqual(list(self.project.issues.all()), [self.issue])
+        self.assertEqual(list(Comment.objects.all()), [self.comment])
+        self.issue.refresh_from_db()
+        self.assertIsNone(self.issue.assignee_user_id)
+
+    def test_deletion_cascades(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.delete(f'/rgpd/{self.contributor.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assert_account_deleted()
+
+    def test_query_count_does_not_grow_with_account_size(self):
+        self.client.force_authenticate(self.contributor)
+        for i in range(5):
+            self.create_project(f'Project {i}', self.contributor)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(f'/rgpd/{self.contributor.pk}/')
+        # The token version is read again once revoked, to be cached:
+        self.assertEqual(len(queries), 18)
+        self.assert_account_deleted()
+
+    def test_chunked_deletion(self):
+        delete_account(self.contributor.pk, chunk_size=1)
+        self.assert_account_deleted()
+
+
+class ExportTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+        for i in range(4):
+            issue = Issue.objects.create(
+                title=f'Issue {i}', tag=Issue.TACHE, priority=Issue.FAIBLE, status=Issue.A_FAIRE,
+                project_id=self.project, author_user_id=self.author, assignee_user_id=self.author
+            )
+            for j in range(i):
+                Comment.objects.create(description=f'Comment {j}', issue_id=issue, author_user_id=self.contributor)
+
+    def export(self, query=''):
+        response = self.client.get(f'{self.project_url()}export/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_export(self):
+        with CaptureQueriesContext(connection) as queries:
+            lines = self.export().splitlines()
+        issues = [json.loads(line) for line in lines]
+        self.assertEqual([issue['id'] for issue in issues], sorted(self.project.issues.values_list('pk', flat=True)))
+        self.assertEqual([len(issue['comments']) for issue in issues], [1, 0, 1, 2, 3])
+        self.assertEqual(issues[0]['comments'][0]['description'], 'Comment')
+        # Permission check, issues, then comments by chunks of 2 issues:
+        issue_queries = [query for query in queries.captured_queries if 'FROM "api_issue"' in query['sql']]
+        comment_queries = [query for query in queries.captured_queries if 'FROM "api_comment"' in query['sql']]
+        self.assertEqual((len(issue_queries), len(comment_queries)), (1, 3))
+
+    def test_csv_export(self):
+        rows = list(csv.reader(StringIO(self.export('?output=csv'))))
+        self.assertEqual(rows[0][:2], ['issue_id', 'issue_title'])
+        # One row per comment, and one for the issue without comments:
+        self.assertEqual(len(rows), 1 + 1 + 1 + 1 + 2 + 3)
+        self.assertEqual(rows[1][1], 'Issue')
+        self.assertEqual(rows[1][-3], 'Comment')
+
+    def test_outsider_is_forbidden(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(f'{self.project_url()}export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_output(self):
+        response = self.client.get(f'{self.project_url()}export/?output=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, records):
+        path = os.path.join(self.directory.name, 'import.ndjson')
+        with open(path, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        return path
+
+    @staticmethod
+    def issue_record(title, comments=2, **fields):
+        return {'issue': {
+            'title': title, 'description': f'Imported {title}', 'tag': Issue.BUG, 'priority': Issue.FAIBLE,
+            'status': Issue.A_FAIRE, 'author': 'author@softdesk.com',
+            'comments': [{'description': f'Reply {i}', 'author': 'contributor@softdesk.com'} for i in range(comments)],
+            **fields
+        }}
+
+    def records(self):
+        return [
+            {'project': {
+                'title': 'Imported', 'description': 'Old tracker', 'type': Project.ANDROID,
+                'author': 'author@softdesk.com', 'contributors': [{'email': 'contributor@softdesk.com', 'role': 'Dev'}]
+            }},
+            self.issue_record('Legacy crash'),
+            self.issue_record('Legacy crash'),
+            self.issue_record('Bad tag', tag='XX'),
+            self.issue_record('Unknown author', author='nobody@softdesk.com'),
+            self.issue_record('Legacy slowness', comments=0),
+            {'project': {'title': 'Project', 'description': 'Duplicate', 'type': Project.IOS,
+                         'author': 'author@softdesk.com'}},
+            self.issue_record('Issue of a skipped project'),
+        ]
+
+    def test_import(self):
+        projects_version = CollectionVersion.get(f'projects:{self.contributor.pk}')[0]
+        err = StringIO()
+        path = self.write_file(self.records())
+        call_command('import_ndjson', path, '--batch-size', '3', stdout=StringIO(), stderr=err)
+        project = Project.objects.get(title='Imported')
+        self.assertEqual(project.author_user_id, self.author)
+        self.assertEqual(set(project.contributors.all()), {self.author, self.contributor})
+        self.assertEqual(sorted(project.issues.values_list('title', flat=True)), ['Legacy crash', 'Legacy slowness'])
+        self.assertEqual(Comment.objects.filter(issue_id__project_id=project).count(), 2)
+        self.assertEqual([line.split(':')[0] for line in err.getvalue().splitlines()],
+                         ['Line 3', 'Line 4', 'Line 5', 'Line 7', 'Line 8'])
+
+        # Search index and versions are up to date although triggers were suspended:
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get('/search/?q=legacy')
+        titles = {result['data']['title'] for result in response.data['results']}
+        self.assertEqual(titles, {'Legacy crash', 'Legacy slowness'})
+        # Bumped once per batch:
+        self.assertEqual(CollectionVersion.get(f'issues:{project.pk}')[0], 2)
+        self.assertEqual(CollectionVersion.get(f'projects:{self.contributor.pk}')[0], projects_version + 1)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_insert'")
+            self.assertEqual(cursor.fetchone()[0], 10)
+        self.assertEqual(project_stats(project.pk)['status'][Issue.A_FAIRE], 2)
+
+    def test_resume_after_failure(self):
+        path = self.write_file(self.records())
+        insert = Importer.insert
+        calls = []
+
+        def failing_insert(importer, records):
+            calls.append(records)
+            if len(calls) == 2:
+                raise RuntimeError('Interrupted')
+            return insert(importer, records)
+
+        with patch.object(Importer, 'insert', failing_insert), self.assertRaises(RuntimeError):
+            call_command('import_ndjson', path, '--batch-size', '3', stdout=StringIO(), stderr=StringIO())
+        project = Project.objects.get(title='Imported')
+        self.assertEqual(project.issues.count(), 1)
+
+        out = StringIO()
+        call_command('import_ndjson', path, '--batch-size', '3', stdout=out, stderr=StringIO())
+        self.assertIn('Resuming after line 3.', out.getvalue())
+        self.assertEqual(sorted(project.issues.values_list('title', flat=True)), ['Legacy crash', 'Legacy slowness'])
+        self.assertEqual(Project.objects.filter(title='Imported').count(), 1)
+
+    def test_create_users(self):
+        path = self.write_file([self.records()[0], self.issue_record('New author', author='new@softdesk.com')])
+        call_command('import_ndjson', path, '--create-users', stdout=StringIO())
+        user = CustomUser.objects.get(email='new@softdesk.com')
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(Issue.objects.filter(title='New author', author_user_id=user).exists())
+
+
+class JobTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        jobs.TASKS['test_task'] = self.record_call
+
+    def tearDown(self):
+        del jobs.TASKS['test_task']
+
+    def record_call(self, fail=False):
+        self.calls.append(fail)
+        if fail:
+            raise ValueError('Task failed')
+        return {'calls': len(self.calls)}
+
+    def test_job_is_run_once(self):
+        job = jobs.enqueue('test_task', user=self.author)
+        self.assertEqual(jobs.work(once=True), 1)
+        self.assertEqual(jobs.work(once=True), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (Job.DONE, 1, {'calls': 1}))
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_BACKOFF=60)
+    def test_failed_job_is_retried_with_backoff(self):
+        job = jobs.enqueue('test_task', fail=True)
+        with self.assertLogs('api.jobs', 'ERROR'):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.PENDING, 1, "ValueError('Task failed')"))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+        # Not due before the backoff delay:
+        self.assertEqual(jobs.work(once=True), 0)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('api.jobs', 'ERROR'):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_time)
+
+    def test_abandoned_job_is_claimed_again(self):
+        job = jobs.enqueue('test_task')
+        self.assertEqual(jobs.claim(), job)
+        self.assertIsNone(jobs.claim())
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(jobs.claim().attempts, 2)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_abandoned_job_fails_after_max_attempts(self):
+        job = jobs.enqueue('test_task')
+        for attempt in range(2):
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            self.assertEqual(jobs.claim(), job)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('api.jobs', 'ERROR'):
+            self.assertIsNone(jobs.claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_time)
+
+    @override_settings(BULK_ISSUE_JOB_THRESHOLD=2)
+    def test_large_bulk_creation_runs_in_job(self):
+        self.client.force_authenticate(self.contributor)
+        items = [
+            {'title': f'Bulk issue {i}', 'tag': Issue.BUG, 'priority': Issue.FAIBLE, 'status': Issue.A_FAIRE}
+            for i in range(3)
+        ]
+        response = self.client.post(f'{self.project_url()}issues/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.PENDING)
+        self.assertEqual(response['Location'], f"/jobs/{response.data['id']}/")
+        self.assertFalse(Issue.objects.filter(title='Bulk issue 0').exists())
+
+        call_command('run_jobs', '--processes', '1', '--once', stdout=StringIO())
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.data['status'], Job.DONE)
+        self.assertEqual(len(response.data['result']['results']), 3)
+        created = Issue.objects.filter(title__startswith='Bulk issue', author_user_id=self.contributor)
+        self.assertEqual(created.count(), 3)
+
+        self.client.force_authenticate(self.author)
+        response = self.client.get(f"/jobs/{response.data['id']}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(ACCOUNT_DELETION_CHUNK_THRESHOLD=0)
+    def test_large_account_deletion_runs_in_job(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f'/rgpd/{self.author.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(response.has_header('Location'))
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        jobs.work(once=True)
+        self.assertFalse(CustomUser.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+
+class SQLiteTuningTests(SoftDeskAPITestCase):
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            for name, value in [('synchronous', 1), ('busy_timeout', 5000), ('cache_size', -20000)]:
+                cursor.execute(f'PRAGMA {name}')
+                self.assertEqual(cursor.fetchone()[0], value)
+
+    def test_stress_command(self):
+        out = StringIO()
+        call_command('stress_sqlite', '--processes', '2', '--requests', '20', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[2:]], ['default', 'tuned'])
+        self.assertEqual([line.split()[-1] for line in lines[2:]], ['0', '0'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SoftDeskAPITestCase):
+    """
+    Routing tests with a replica in a second SQLite file, which is not replicated:
+    rows are copied to the replica by the tests, so that reads from the replica can be told apart.
+    """
+    # The replica alias only exists once setUpClass added it, '__all__' being resolved then:
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            **connections['default'].settings_dict, 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3')
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        for obj in [self.author, self.contributor, self.project, *Contributor.objects.all(), self.issue]:
+            obj.save(using='replica', force_insert=True)
+        Project.objects.filter(pk=self.project.pk).update(description='Written on primary')
+        self.client.force_authenticate(self.author)
+
+    def test_reads_go_to_replica(self):
+        response = self.client.get(self.project_url())
+        self.assertEqual(response.data['description'], 'Description')
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual([issue['id'] for issue in response.data['results']], [self.issue.pk])
+
+    def test_permission_lookups_go_to_replica(self):
+        Issue.objects.filter(pk=self.issue.pk).update(author_user_id=self.contributor)
+        self.client.force_authenticate(self.contributor)
+        response = self.client.delete(self.issue_url())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_memberships_are_read_from_primary(self):
+        # Removed on the primary, the membership is still on the replica:
+        Contributor.objects.filter(user_id=self.contributor).delete()
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f'{self.project_url()}issues/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with replica_reads():
+            self.assertEqual(get_memberships(self.contributor.pk), {})
+
+    def test_user_reads_own_writes(self):
+        response = self.client.put(self.project_url(), {'title': 'New title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.project_url())
+        self.assertEqual(response.data['title'], 'New title')
+        # Other users still read from the replica:
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(self.project_url())
+        self.assertEqual(response.data['title'], 'Project')
+
+    def test_stickiness_expires(self):
+        self.client.put(self.project_url(), {'title': 'New title'})
+        cache.delete(sticky_key(self.author.pk))
+        response = self.client.get(self.project_url())
+        self.assertEqual(response.data['title'], 'Project')
+
+
+class PasswordHashingTests(SoftDeskAPITestCase):
+    def login(self, password='password'):
+        return self.client.post('/login/', {'email': 'contributor@softdesk.com', 'password': password})
+
+    def test_login_and_signup_in_pool(self):
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/signup/', {'email': 'new@softdesk.com', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(CustomUser.objects.get(email='new@softdesk.com').check_password('password'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0, PASSWORD_HASHING_RETRY_AFTER=2)
+    def test_saturated_pool_answers_503(self):
+        pool = hashing.get_pool()
+        pool.slots.acquire()
+        try:
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '2')
+            response = self.client.post('/signup/', {'email': 'new@softdesk.com', 'password': 'password'})
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            pool.slots.release()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_ITERATIONS=1000)
+    def test_outdated_hash_is_upgraded_on_login(self):
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.contributor.refresh_from_db()
+        self.assertTrue(self.contributor.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.contributor.check_password('password'))
+
+
+class AsyncReadTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        token = VersionedTokenObtainPairSerializer.get_token(self.contributor).access_token
+        self.authorization = f'Bearer {token}'
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    async def assert_same_response(self, url):
+        response = await AsyncClient().get(f'/async{url}', AUTHORIZATION=self.authorization)
+        expected = await sync_to_async(self.client.get)(url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), json.loads(expected.content))
+
+    async def test_responses_match_sync_views(self):
+        for url in (
+            '/projects/', self.project_url(), f'{self.project_url()}issues/', f'{self.project_url()}issues/?tag=XX',
+            self.issue_url(), f'{self.issue_url()}comments/', self.comment_url(), '/projects/999/issues/',
+        ):
+            await self.assert_same_response(url)
+
+    async def test_outsider_is_forbidden(self):
+        token = await sync_to_async(VersionedTokenObtainPairSerializer.get_token)(self.outsider)
+        response = await AsyncClient().get(
+            f'/async{self.project_url()}issues/', AUTHORIZATION=f'Bearer {token.access_token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.json(), {'detail': "Access forbidden: You are not contributor of the project"})
+
+    async def test_authentication_is_required(self):
+        response = await AsyncClient().get('/async/projects/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+class EventStreamTests(APITransactionTestCase):
+    """
+    Transaction test case with the data of SoftDeskAPITestCase: connections are served in tasks, whose database work
+    runs in another thread than the test, which must see committed rows.
+    """
+    create_project = staticmethod(SoftDeskAPITestCase.create_project)
+    project_url = SoftDeskAPITestCase.project_url
+
+    def setUp(self):
+        SoftDeskAPITestCase.setUp(self)
+        self.token = str(VersionedTokenObtainPairSerializer.get_token(self.contributor).access_token)
+
+    async def connect(self, token=None, host=b'testserver'):
+        """
+        Opens an event stream of the project on the ASGI application.
+        :return: (task running the connection, queue of messages to the application, queue of messages sent by it,
+        response status).
+        """
+        received, sent = asyncio.Queue(), asyncio.Queue()
+        received.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': f'{self.project_url()}events/', 'query_string': b'',
+            'headers': [(b'host', host), (b'authorization', f'Bearer {token or self.token}'.encode())],
+        }
+        task = asyncio.ensure_future(asgi.application(scope, received.get, sent.put))
+        start = await asyncio.wait_for(sent.get(), 5)
+        if start['status'] == status.HTTP_200_OK:
+            self.assertEqual(dict(start['headers'])[b'content-type'], b'text/event-stream')
+            await asyncio.wait_for(sent.get(), 5)
+        return task, received, sent, start['status']
+
+    @staticmethod
+    async def next_event(sent):
+        message = await asyncio.wait_for(sent.get(), 5)
+        lines = dict(line.split(': ', 1) for line in message['body'].decode().strip().split('\n'))
+        return lines.get('id'), lines['event'], json.loads(lines['data'])
+
+    @staticmethod
+    async def disconnect(*connections):
+        for task, received, sent, status_code in connections:
+            received.put_nowait({'type': 'http.disconnect'})
+        await asyncio.wait_for(asyncio.gather(*(connection[0] for connection in connections)), 5)
+
+    def create_issue(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post(f'{self.project_url()}issues/', {
+            'title': 'Pushed', 'tag': Issue.BUG, 'priority': Issue.FAIBLE, 'status': Issue.A_FAIRE,
+            'assignee_user_id': self.author.pk
+        })
+        return response.data['id']
+
+    async def test_many_subscribers_receive_events(self):
+        connections = [await self.connect() for _ in range(500)]
+        self.assertEqual({connection[3] for connection in connections}, {status.HTTP_200_OK})
+        self.assertEqual(len(events.hub.subscriptions[self.project.pk]), 500)
+        issue_pk = await sync_to_async(self.create_issue)()
+        for task, received, sent, status_code in connections:
+            self.assertEqual(
+                await self.next_event(sent), (None, 'issue', {'type': 'issue', 'id': issue_pk, 'action': 'create'})
+            )
+        await self.disconnect(*connections)
+        self.assertEqual(events.hub.project_pks(), [])
+
+    async def test_change_log_backend(self):
+        with self.settings(EVENTS_BACKEND='api.events.ChangeLogBackend', EVENTS_POLL_INTERVAL=0.01):
+            connection = await self.connect()
+            while events.get_backend().cursor is None:
+                await asyncio.sleep(0.01)
+            # Bulk writes are seen too, as well as writes of other processes:
+            await sync_to_async(Comment.objects.filter(pk=self.comment.pk).update)(description='Edited')
+            cursor, event_type, data = await self.next_event(connection[2])
+            self.assertEqual((event_type, data['id'], data['action']), ('comment', self.comment.pk, 'update'))
+            last_change = await sync_to_async(Change.objects.latest)('id')
+            self.assertEqual(int(cursor), last_change.pk)
+            await self.disconnect(connection)
+
+    async def test_change_log_backend_resumes_after_restart(self):
+        with self.settings(EVENTS_BACKEND='api.events.ChangeLogBackend', EVENTS_POLL_INTERVAL=0.01):
+            connection = await self.connect()
+            while events.get_backend().cursor is None:
+                await asyncio.sleep(0.01)
+            await self.disconnect(connection)
+            await asyncio.wait_for(events.get_backend().task, 5)
+            # Written while the poll task is stopped:
+            await sync_to_async(Comment.objects.filter(pk=self.comment.pk).update)(description='Edited')
+            connection = await self.connect()
+            cursor, event_type, data = await self.next_event(connection[2])
+            self.assertEqual((event_type, data['id'], data['action']), ('comment', self.comment.pk, 'update'))
+            await self.disconnect(connection)
+
+    async def test_host_is_validated(self):
+        task, received, sent, status_code = await self.connect(host=b'evil.com')
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+        await task
+        self.assertEqual(events.hub.project_pks(), [])
+
+    async def test_slow_subscriber_is_disconnected(self):
+        with self.settings(EVENTS_QUEUE_SIZE=2):
+            task, received, sent, status_code = await self.connect()
+            for pk in range(5):
+                events.hub.publish(self.project.pk, {'type': 'issue', 'id': pk, 'action': 'update'})
+            self.assertEqual((await self.next_event(sent))[1], 'overflow')
+            await asyncio.wait_for(task, 5)
+            self.assertEqual(events.hub.project_pks(), [])
+
+    async def test_outsider_is_forbidden(self):
+        token = await sync_to_async(VersionedTokenObtainPairSerializer.get_token)(self.outsider)
+        task, received, sent, status_code = await self.connect(str(token.access_token))
+        self.assertEqual(status_code, status.HTTP_403_FORBIDDEN)
+        await task
+        self.assertEqual(events.hub.project_pks(), [])
+
+    async def test_authentication_is_required(self):
+        task, received, sent, status_code = await self.connect('invalid')
+        self.assertEqual(status_code, status.HTTP_401_UNAUTHORIZED)
+        await task
+
+
+class BenchmarkTests(SoftDeskAPITestCase):
+    def test_query_counts_do_not_grow_with_dataset_size(self):
+        small = benchmark.Dataset(scale=1, prefix='small').seed()
+        large = benchmark.Dataset(scale=3, prefix='large').seed()
+        small_results = benchmark.run(small, iterations=2)
+        large_results = benchmark.run(large, iterations=2)
+        self.assertEqual(benchmark.growing_query_counts(small_results, large_results), [])
+
+    def test_baseline_gates_query_counts(self):
+        results = {'list': {'queries': 3, 'p95': 90.0}, 'new': {'queries': 1, 'p95': 1.0}}
+        baseline = {'list': {'queries': 2, 'p95': 1.0}}
+        self.assertEqual(benchmark.missing_from_baseline(results, baseline), ['new'])
+        self.assertEqual(benchmark.over_baseline_queries(results, baseline), ['list'])
+        with self.assertRaisesMessage(CommandError, '--check-latency needs at least'):
+            call_command('benchmark_api', '--check-latency', '--iterations', '5')
+
+
+class RequestTimingTests(SoftDeskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.contributor)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_has_server_timing(self):
+        with self.assertLogs('api.timing', level='INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f'{self.project_url()}users/')
+        metrics = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(set(metrics), {'db', 'auth', 'perm', 'ser', 'total'})
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', metrics['db'])
+        log = json.loads(logs.records[0].getMessage())
+        self.assertEqual(log['queries'], len(queries.captured_queries))
+        self.assertEqual(log['path'], f'{self.project_url()}users/')
+        self.assertGreater(log['ser_ms'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    async def test_async_request_is_timed_without_thread(self):
+        async def get_response(request):
+            pass
+        self.assertTrue(asyncio.iscoroutinefunction(request_timing_middleware(get_response)))
+        token = await sync_to_async(VersionedTokenObtainPairSerializer.get_token)(self.contributor)
+        with self.assertLogs('api.timing', level='INFO') as logs:
+            response = await AsyncClient().get(
+                f'/async{self.project_url()}issues/', AUTHORIZATION=f'Bearer {token.access_token}'
+            )
+        self.assertTrue(response.has_header('Server-Timing'))
+        self.assertGreater(json.loads(logs.records[0].getMessage())['queries'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    async def test_interleaved_async_requests_record_their_own_queries(self):
+        first_queried = asyncio.Event()
+        second_done = asyncio.Event()
+
+        def query(count):
+            with connection.cursor() as cursor:
+                for _ in range(count):
+                    cursor.execute('SELECT 1')
+
+        async def get_response(request):
+            if request.path == '/first/':
+                await sync_to_async(query)(1)
+                first_queried.set()
+                await second_done.wait()
+                await sync_to_async(query)(1)
+            else:
+                await first_queried.wait()
+                await sync_to_async(query)(3)
+                second_done.set()
+            return HttpResponse()
+        middleware = request_timing_middleware(get_response)
+        with self.assertLogs('api.timing', level='INFO') as logs:
+            await asyncio.gather(*(middleware(RequestFactory().get(path)) for path in ('/first/', '/second/')))
+        queries = {log['path']: log['queries'] for log in map(json.loads, (r.getMessage() for r in logs.records))}
+        self.assertEqual(queries, {'/first/': 2, '/second/': 3})
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_request_not_sampled(self):
+        response = self.client.get(f'{self.project_url()}users/')
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -1,15 +1,41 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError, transaction
-from rest_framework import viewsets, views, permissions, status
+from rest_framework import viewsets, views, permissions, status, mixins
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
-from .models import Project, Contributor, Issue, Comment, CustomUser
+from .models import Project, Contributor, Issue, Comment, CustomUser, Job, Change
 from .serializers import ProjectSerializer, CommentSerializer, IssueSerializer, UserSerializer, ContributorSerializer,\
-    CreateContributorSerializer, CreateIssueSerializer, CreateCommentSerializer
+    CreateContributorSerializer, CreateIssueSerializer, CreateCommentSerializer, BulkCreateIssueSerializer,\
+    BulkIssueStatusSerializer, JobSerializer
 from .permissions import IsProjectContributor, IsProjectAuthor, IsCurrentUser, IsIssueAuthor, IsCommentAuthor
+from .authentication import revoke_tokens
+from .changes import CursorExpired, changes_since
+from .deletion import account_size, delete_account
+from .export import FORMATS, issues_with_comments
+from .jobs import enqueue
+from .membership import MembershipResolver
+from .filters import IssueFilterBackend
+from .mixins import ConditionalGetMixin, CachedListMixin, TimingMixin, ReplicaReadMixin, EventPublishingMixin
+from .search import search
+from .stats import project_stats
+
+
+def job_response(job):
+    """
+    :return: 202 Accepted response for an operation run by a background job, pointing to the job status.
+    """
+    return Response(
+        JobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={'Location': reverse('jobs-detail', [job.pk])}
+    )
 
 
-class SignUpAPIView(views.APIView):
+class SignUpAPIView(TimingMixin, views.APIView):
     """
     Using APIView inheritance as we only need post in this endpoint.
     """
@@ -32,19 +58,73 @@ class SignUpAPIView(views.APIView):
             return Response("There was an integrity error.", status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class SearchAPIView(TimingMixin, views.APIView):
+    """
+    Full-text search over issues and comments of the projects of which the user is contributor.
+    - 'q' query parameter holds the words to search, all of them having to match.
+    - Results are ranked best matches first, and paginated with 'page_size' and 'offset' query parameters.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_page_size = 200
+
+    def get(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', api_settings.PAGE_SIZE))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response("page_size and offset must be integers.", status=status.HTTP_400_BAD_REQUEST)
+        if offset < 0:
+            return Response("offset must not be negative.", status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        # One extra row is fetched to know if there is a next page:
+        matches = search(request.user, request.query_params.get('q', ''), page_size + 1, offset)
+        next_url = None
+        if len(matches) > page_size:
+            matches = matches[:page_size]
+            next_url = replace_query_param(request.build_absolute_uri(), 'offset', offset + page_size)
+
+        # Rows are read again in the projects of the user, a stale index row never exposing another project:
+        project_pks = MembershipResolver.for_request(request).project_pks()
+        issues = Issue.objects.filter(project_id__in=project_pks).in_bulk(
+            [pk for kind, pk in matches if kind == 'issue']
+        )
+        comments = Comment.objects.filter(issue_id__project_id__in=project_pks).in_bulk(
+            [pk for kind, pk in matches if kind == 'comment']
+        )
+        results = []
+        for kind, pk in matches:
+            if kind == 'issue' and pk in issues:
+                results.append({'type': kind, 'data': IssueSerializer(issues[pk]).data})
+            elif kind == 'comment' and pk in comments:
+                results.append({'type': kind, 'data': CommentSerializer(comments[pk]).data})
+        return Response({'next': next_url, 'results': results}, status=status.HTTP_200_OK)
+
+
+class ProjectViewSet(TimingMixin, ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
 
     def get_permissions(self):
         permission_classes = [permissions.IsAuthenticated()]
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'export', 'changes', 'stats'):
             permission_classes = [permissions.IsAuthenticated(), IsProjectContributor()]
         elif self.action == 'destroy' or self.action == 'update':
             permission_classes = [permissions.IsAuthenticated(), IsProjectAuthor()]
         return permission_classes
 
     def get_queryset(self):
-        return Project.objects.filter(contributors=self.request.user)
+        """
+        Projects of which the user is contributor, filtered by the pks of the cached memberships of the user
+        (see membership.py) rather than by a join on Contributor.
+        """
+        projects_of_user = MembershipResolver.for_request(self.request).project_pks()
+        queryset = Project.objects.filter(pk__in=projects_of_user)
+        return self.get_serializer_class().setup_eager_loading(queryset)
+
+    def get_version_key(self):
+        if self.action == 'retrieve':
+            return f"project:{self.kwargs['pk']}"
+        return f'projects:{self.request.user.pk}'
 
     def update(self, request, *args, **kwargs):
         """
@@ -62,13 +142,66 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        Streams all issues of the project with their comments, as NDJSON (default) or CSV with ?output=csv
+        (see api/export.py). The query parameter isn't named format, which selects DRF renderers.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in FORMATS:
+            return Response(f"Output must be one of {', '.join(FORMATS)}.", status=status.HTTP_400_BAD_REQUEST)
+        writer, content_type = FORMATS[output]
+        response = StreamingHttpResponse(
+            writer(issues_with_comments(int(pk), settings.EXPORT_CHUNK_SIZE)), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="project-{pk}-issues.{output}"'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Number of issues of the project by status, priority and tag, read from counters (see api/stats.py).
+        """
+        return Response(project_stats(int(pk)), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """
+        Changes of the project, its contributors, issues and comments after the cursor given by ?since=
+        (see api/changes.py), at most CHANGES_PAGE_SIZE log entries per response.
+        Answers 410 Gone if the cursor is older than the last compaction of the log.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            if since < 0:
+                raise ValueError()
+        except ValueError:
+            return Response("since must be a positive integer.", status=status.HTTP_400_BAD_REQUEST)
+        try:
+            changes, cursor, has_more = changes_since(int(pk), since, settings.CHANGES_PAGE_SIZE)
+        except CursorExpired:
+            return Response(
+                "Changes since this cursor were compacted, the project must be downloaded again.",
+                status=status.HTTP_410_GONE
+            )
+        return Response({'cursor': cursor, 'has_more': has_more, 'changes': changes}, status=status.HTTP_200_OK)
+
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(TimingMixin, ReplicaReadMixin, ConditionalGetMixin, CachedListMixin, EventPublishingMixin,
+                   viewsets.ModelViewSet):
     serializer_class = IssueSerializer
+    event_type = Change.ISSUE
+    filter_backends = [IssueFilterBackend]
+    ordering_choices = {
+        'created_time': ('created_time', 'id'),
+        '-created_time': ('-created_time', '-id'),
+    }
+    max_bulk_size = 1000
 
     def get_permissions(self):
         permission_classes = [permissions.IsAuthenticated()]
-        if self.action == 'list' or self.action == 'retrieve' or self.action == 'create':
+        if self.action in ('list', 'retrieve', 'create', 'bulk_create', 'bulk_update'):
             permission_classes = [permissions.IsAuthenticated(), IsProjectContributor()]
         elif self.action == 'destroy' or self.action == 'update':
             permission_classes = [permissions.IsAuthenticated(), IsProjectContributor(), IsIssueAuthor()]
@@ -77,6 +210,104 @@ class IssueViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Issue.objects.filter(project_id=self.kwargs['project_pk'])
 
+    def get_version_key(self):
+        return f"issues:{self.kwargs['project_pk']}"
+
+    @staticmethod
+    def bulk_response(results, errors, success_status):
+        """
+        :return: success_status if every item succeeded, 207 if some failed, 400 if all failed,
+        errors being given by index of the item in the request.
+        """
+        if not errors:
+            response_status = success_status
+        elif results:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results, 'errors': errors}, status=response_status)
+
+    @staticmethod
+    def create_issues(project_pk, user, items):
+        """
+        Creates a list of issues of project_pk written by user, in a single transaction.
+        - Items are validated one by one, invalid ones being reported by index without aborting the batch.
+        - Titles already used in the project or repeated in the batch are found with one query.
+        - Valid issues are inserted with bulk_create.
+        :return: the serialized issues created and the dict of errors by index.
+        :raise IntegrityError: if the insert failed, no issue being created.
+        """
+        serializer = BulkCreateIssueSerializer(data=items, many=True)
+        valid_items, errors = serializer.validate_items()
+
+        titles = [data['title'] for index, data in valid_items]
+        existing_titles = set(
+            Issue.objects.filter(project_id=int(project_pk), title__in=titles).values_list('title', flat=True)
+        )
+        issues = []
+        for index, data in valid_items:
+            if data['title'] in existing_titles:
+                errors[index] = {'title': ["An issue with this title already exists for this project."]}
+                continue
+            existing_titles.add(data['title'])
+            data.setdefault('assignee_user_id', user)
+            issues.append(Issue(**data, project_id_id=int(project_pk), author_user_id=user))
+
+        with transaction.atomic():
+            issues = Issue.objects.bulk_create(issues)
+        return IssueSerializer(issues, many=True).data, errors
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, project_pk=None):
+        """
+        Creates a list of issues in a single transaction, see create_issues.
+        Lists of more than BULK_ISSUE_JOB_THRESHOLD issues are created by a background job,
+        answering 202 Accepted with the job, whose result is the response data.
+        """
+        if isinstance(request.data, list) and len(request.data) > self.max_bulk_size:
+            return Response(f"At most {self.max_bulk_size} issues per request.", status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(request.data, list) and len(request.data) > settings.BULK_ISSUE_JOB_THRESHOLD:
+            job = enqueue(
+                'bulk_create_issues', user=request.user, project_pk=int(project_pk), user_pk=request.user.pk,
+                items=request.data
+            )
+            return job_response(job)
+        try:
+            results, errors = self.create_issues(project_pk, request.user, request.data)
+        except IntegrityError:
+            return Response("There was an integrity error, no issue was created.", status=status.HTTP_400_BAD_REQUEST)
+        self.publish_events([result['id'] for result in results], Change.CREATE)
+        return self.bulk_response(results, errors, status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, project_pk=None):
+        """
+        Updates the status of a list of issues, given as {"id": ..., "status": ...} items, in a single transaction.
+        - Issues are loaded with one query and written with bulk_update.
+        - Items targeting an unknown issue or an issue of which the user is not the author are reported by index.
+        """
+        if isinstance(request.data, list) and len(request.data) > self.max_bulk_size:
+            return Response(f"At most {self.max_bulk_size} issues per request.", status=status.HTTP_400_BAD_REQUEST)
+        serializer = BulkIssueStatusSerializer(data=request.data, many=True)
+        valid_items, errors = serializer.validate_items()
+
+        issues = self.get_queryset().in_bulk([data['id'] for index, data in valid_items])
+        updated_issues = []
+        for index, data in valid_items:
+            issue = issues.get(data['id'])
+            if issue is None:
+                errors[index] = {'id': ["Issue does not exist."]}
+            elif issue.author_user_id_id != request.user.pk:
+                errors[index] = {'id': ["Access forbidden: You are not the author of the issue"]}
+            else:
+                issue.status = data['status']
+                updated_issues.append(issue)
+
+        with transaction.atomic():
+            Issue.objects.bulk_update(updated_issues, ['status'])
+        self.publish_events([issue.pk for issue in updated_issues], Change.UPDATE)
+        return self.bulk_response(IssueSerializer(updated_issues, many=True).data, errors, status.HTTP_200_OK)
+
     def create(self, request, *args, **kwargs):
         """
         Overload of create method.
@@ -136,8 +367,10 @@ class IssueViewSet(viewsets.ModelViewSet):
             return Response("There was an integrity error.", status=status.HTTP_400_BAD_REQUEST)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(TimingMixin, ReplicaReadMixin, ConditionalGetMixin, CachedListMixin, EventPublishingMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    event_type = Change.COMMENT
     permission_classes = [permissions.IsAuthenticated()]
 
     def get_permissions(self):
@@ -151,6 +384,9 @@ class CommentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Comment.objects.filter(issue_id=self.kwargs['issue_pk'])
 
+    def get_version_key(self):
+        return f"comments:{self.kwargs['issue_pk']}"
+
     def create(self, request, *args, **kwargs):
         """
         Overload of create method.
@@ -218,8 +454,9 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Response("There was an integrity error.", status=status.HTTP_400_BAD_REQUEST)
 
 
-class ContributorViewSet(viewsets.ModelViewSet):
+class ContributorViewSet(TimingMixin, ReplicaReadMixin, EventPublishingMixin, viewsets.ModelViewSet):
     serializer_class = ContributorSerializer
+    event_type = Change.CONTRIBUTOR
 
     def get_permissions(self):
         permission_classes = [permissions.IsAuthenticated()]
@@ -261,7 +498,7 @@ class ContributorViewSet(viewsets.ModelViewSet):
             return Response("There was an integrity error.", status=status.HTTP_400_BAD_REQUEST)
 
 
-class RGPDViewSet(viewsets.ViewSet):
+class RGPDViewSet(TimingMixin, ReplicaReadMixin, viewsets.ViewSet):
     """
     RGPD Viewset, allowing consultation and modification of the user according to RGPD laws.
     Viewset is used as we don't need all endpoints given by ModelViewSet.
@@ -296,17 +533,30 @@ class RGPDViewSet(viewsets.ViewSet):
 
     def destroy(self, request, pk=None):
         """
-        - Deletes user and all projects of which user is the author
-        (got to be handled manually cause there is no direct foreign_keys between users and projects).
-        - Contributors, issues and comments objects of which user is the author are automatically deleted
-        because on_delete=cascade in respective models' foreign keys.
+        - Deletes user, all projects of which user is the author with their contributors, issues and comments,
+        and issues and comments written by user in other projects, with set-based DELETE statements
+        (see api.deletion).
+        - Accounts with more than ACCOUNT_DELETION_CHUNK_THRESHOLD issues and comments are deactivated
+        right away and deleted by chunks in a background job, answering 202 Accepted. The job status isn't
+        pointed to, its tokens being revoked the user can't read it.
         """
         queryset = CustomUser.objects.all()
         user = get_object_or_404(queryset, pk=pk)
-        projects_of_which_user_is_contributor = user.project_set.all()
-        with transaction.atomic():
-            for project in projects_of_which_user_is_contributor:
-                if project.author_user_id == int(pk):
-                    project.delete()
-            user.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        if account_size(user.pk) > settings.ACCOUNT_DELETION_CHUNK_THRESHOLD:
+            CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+            revoke_tokens(user.pk)
+            enqueue('delete_account', user_pk=user.pk, chunk_size=settings.ACCOUNT_DELETION_CHUNK_SIZE)
+            return Response(status=status.HTTP_202_ACCEPTED)
+        delete_account(user.pk)
+        revoke_tokens(user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobViewSet(TimingMixin, ReplicaReadMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Status of the background jobs started by the user, given by endpoints answering 202 Accepted.
+    """
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(user_id=self.request.user)